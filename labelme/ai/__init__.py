@@ -1,6 +1,8 @@
 import gdown
 
+from ._utils import compute_polygon_from_mask  # NOQA: F401
 from .efficient_sam import EfficientSam
+from .embedding_cache import DiskEmbeddingCache  # NOQA: F401
 from .segment_anything_model import SegmentAnythingModel
 from .text_to_annotation import get_rectangles_from_texts  # NOQA: F401
 from .text_to_annotation import get_shapes_from_annotations  # NOQA: F401
@@ -10,7 +12,7 @@ from .text_to_annotation import non_maximum_suppression  # NOQA: F401
 class SegmentAnythingModelVitB(SegmentAnythingModel):
     name = "SegmentAnything (speed)"
 
-    def __init__(self):
+    def __init__(self, embedding_cache=None):
         super().__init__(
             encoder_path=gdown.cached_download(
                 url="https://github.com/wkentaro/labelme/releases/download/sam-20230416/sam_vit_b_01ec64.quantized.encoder.onnx",  # NOQA
@@ -20,13 +22,14 @@ class SegmentAnythingModelVitB(SegmentAnythingModel):
                 url="https://github.com/wkentaro/labelme/releases/download/sam-20230416/sam_vit_b_01ec64.quantized.decoder.onnx",  # NOQA
                 md5="4253558be238c15fc265a7a876aaec82",
             ),
+            embedding_cache=embedding_cache,
         )
 
 
 class SegmentAnythingModelVitL(SegmentAnythingModel):
     name = "SegmentAnything (balanced)"
 
-    def __init__(self):
+    def __init__(self, embedding_cache=None):
         super().__init__(
             encoder_path=gdown.cached_download(
                 url="https://github.com/wkentaro/labelme/releases/download/sam-20230416/sam_vit_l_0b3195.quantized.encoder.onnx",  # NOQA
@@ -36,13 +39,14 @@ class SegmentAnythingModelVitL(SegmentAnythingModel):
                 url="https://github.com/wkentaro/labelme/releases/download/sam-20230416/sam_vit_l_0b3195.quantized.decoder.onnx",  # NOQA
                 md5="851b7faac91e8e23940ee1294231d5c7",
             ),
+            embedding_cache=embedding_cache,
         )
 
 
 class SegmentAnythingModelVitH(SegmentAnythingModel):
     name = "SegmentAnything (accuracy)"
 
-    def __init__(self):
+    def __init__(self, embedding_cache=None):
         super().__init__(
             encoder_path=gdown.cached_download(
                 url="https://github.com/wkentaro/labelme/releases/download/sam-20230416/sam_vit_h_4b8939.quantized.encoder.onnx",  # NOQA
@@ -52,13 +56,14 @@ class SegmentAnythingModelVitH(SegmentAnythingModel):
                 url="https://github.com/wkentaro/labelme/releases/download/sam-20230416/sam_vit_h_4b8939.quantized.decoder.onnx",  # NOQA
                 md5="a997a408347aa081b17a3ffff9f42a80",
             ),
+            embedding_cache=embedding_cache,
         )
 
 
 class EfficientSamVitT(EfficientSam):
     name = "EfficientSam (speed)"
 
-    def __init__(self):
+    def __init__(self, embedding_cache=None):
         super().__init__(
             encoder_path=gdown.cached_download(
                 url="https://github.com/labelmeai/efficient-sam/releases/download/onnx-models-20231225/efficient_sam_vitt_encoder.onnx",  # NOQA
@@ -68,13 +73,14 @@ class EfficientSamVitT(EfficientSam):
                 url="https://github.com/labelmeai/efficient-sam/releases/download/onnx-models-20231225/efficient_sam_vitt_decoder.onnx",  # NOQA
                 md5="be3575ca4ed9b35821ac30991ab01843",
             ),
+            embedding_cache=embedding_cache,
         )
 
 
 class EfficientSamVitS(EfficientSam):
     name = "EfficientSam (accuracy)"
 
-    def __init__(self):
+    def __init__(self, embedding_cache=None):
         super().__init__(
             encoder_path=gdown.cached_download(
                 url="https://github.com/labelmeai/efficient-sam/releases/download/onnx-models-20231225/efficient_sam_vits_encoder.onnx",  # NOQA
@@ -84,6 +90,7 @@ class EfficientSamVitS(EfficientSam):
                 url="https://github.com/labelmeai/efficient-sam/releases/download/onnx-models-20231225/efficient_sam_vits_decoder.onnx",  # NOQA
                 md5="d9372f4a7bbb1a01d236b0508300b994",
             ),
+            embedding_cache=embedding_cache,
         )
 
 
@@ -1,4 +1,4 @@
-import collections
+import os.path as osp
 import threading
 
 import imgviz
@@ -8,49 +8,108 @@ import skimage
 
 from ..logger import logger
 from . import _utils
+from .embedding_cache import EmbeddingPrefetcher
+from .embedding_cache import MemoryEmbeddingCache
+from .embedding_cache import get_image_hash
 
 
 class EfficientSam:
-    def __init__(self, encoder_path, decoder_path):
+    def __init__(self, encoder_path, decoder_path, embedding_cache=None):
         self._encoder_session = onnxruntime.InferenceSession(encoder_path)
         self._decoder_session = onnxruntime.InferenceSession(decoder_path)
 
         self._lock = threading.Lock()
-        self._image_embedding_cache = collections.OrderedDict()
+        self._encoder_lock = threading.Lock()
+        self._image_embedding_cache = MemoryEmbeddingCache(max_entries=10)
+
+        self._disk_embedding_cache = embedding_cache
+        self._model_name = osp.splitext(osp.basename(encoder_path))[0]
 
         self._thread = None
+        self._prefetcher = EmbeddingPrefetcher(self._prefetch_image_embedding)
 
-    def set_image(self, image: np.ndarray):
+    def set_image(self, image: np.ndarray, image_embedding=None):
+        """Set the image, with its embedding if already computed for it."""
+        image_hash = get_image_hash(image)
         with self._lock:
             self._image = image
-            self._image_embedding = self._image_embedding_cache.get(
-                self._image.tobytes()
-            )
+            self._image_hash = image_hash
+            if image_embedding is None:
+                image_embedding = self._image_embedding_cache.get(image_hash)
+            self._image_embedding = image_embedding
 
         if self._image_embedding is None:
             self._thread = threading.Thread(
-                target=self._compute_and_cache_image_embedding
+                target=self._compute_and_cache_image_embedding,
+                args=(image, image_hash),
             )
             self._thread.start()
+        else:
+            self._thread = None
+
+    def compute_image_embedding(self, image: np.ndarray):
+        """Compute the embedding into the cache without changing the image."""
+        return self._get_or_compute_image_embedding(
+            image=image, image_hash=get_image_hash(image)
+        )
 
-    def _compute_and_cache_image_embedding(self):
+    def prefetch_images(self, image_loaders):
+        self._prefetcher.submit(image_loaders)
+
+    def _prefetch_image_embedding(self, image: np.ndarray):
+        # wait for the current image so that it is never delayed by prefetching
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.compute_image_embedding(image=image)
+
+    def _compute_and_cache_image_embedding(self, image, image_hash):
+        image_embedding = self._get_or_compute_image_embedding(
+            image=image, image_hash=image_hash
+        )
         with self._lock:
-            logger.debug("Computing image embedding...")
-            image = imgviz.rgba2rgb(self._image)
-            batched_images = image.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
-            (self._image_embedding,) = self._encoder_session.run(
-                output_names=None,
-                input_feed={"batched_images": batched_images},
+            # the image may have been changed while computing
+            if self._image_hash == image_hash:
+                self._image_embedding = image_embedding
+
+    def _get_or_compute_image_embedding(self, image, image_hash):
+        with self._encoder_lock:
+            # may have been computed by prefetching while waiting for the lock
+            if image_hash in self._image_embedding_cache:
+                return self._image_embedding_cache.get(image_hash)
+
+            image_embedding = None
+            disk_cache_key = None
+            if self._disk_embedding_cache is not None:
+                disk_cache_key = self._disk_embedding_cache.get_key(
+                    model_name=self._model_name, image_hash=image_hash
+                )
+                image_embedding = self._disk_embedding_cache.get(disk_cache_key)
+
+            if image_embedding is None:
+                logger.debug("Computing image embedding...")
+                image = imgviz.rgba2rgb(image)
+                batched_images = (
+                    image.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+                )
+                (image_embedding,) = self._encoder_session.run(
+                    output_names=None,
+                    input_feed={"batched_images": batched_images},
+                )
+                if disk_cache_key is not None:
+                    self._disk_embedding_cache.put(disk_cache_key, image_embedding)
+                logger.debug("Done computing image embedding.")
+
+            self._image_embedding_cache.put(image_hash, image_embedding)
+            logger.debug(
+                "Image embedding cache: {}".format(self._image_embedding_cache.stats())
             )
-            if len(self._image_embedding_cache) > 10:
-                self._image_embedding_cache.popitem(last=False)
-            self._image_embedding_cache[self._image.tobytes()] = self._image_embedding
-            logger.debug("Done computing image embedding.")
+            return image_embedding
 
     def _get_image_embedding(self):
-        if self._thread is not None:
-            self._thread.join()
-            self._thread = None
+        thread = self._thread
+        if thread is not None:
+            thread.join()
         with self._lock:
             return self._image_embedding
 
@@ -63,21 +122,55 @@ class EfficientSam:
             point_labels=point_labels,
         )
 
+    def predict_masks_from_prompts(self, prompts):
+        """Predict masks for prompts in a single decoder run.
+
+        Each prompt is either dict(points=..., point_labels=...) or
+        dict(box=[x1, y1, x2, y2]).
+        """
+        if not prompts:
+            return []
+        return _compute_masks_from_prompts(
+            decoder_session=self._decoder_session,
+            image=self._image,
+            image_embedding=self._get_image_embedding(),
+            prompts=prompts,
+        )
+
     def predict_polygon_from_points(self, points, point_labels):
         mask = self.predict_mask_from_points(points=points, point_labels=point_labels)
         return _utils.compute_polygon_from_mask(mask=mask)
 
 
+def _get_points_from_prompt(prompt):
+    if "box" in prompt:
+        x1, y1, x2, y2 = prompt["box"]
+        return [[x1, y1], [x2, y2]], [2, 3]  # top-left and bottom-right corners
+    return prompt["points"], prompt["point_labels"]
+
+
 def _compute_mask_from_points(
     decoder_session, image, image_embedding, points, point_labels
 ):
-    input_point = np.array(points, dtype=np.float32)
-    input_label = np.array(point_labels, dtype=np.float32)
+    return _compute_masks_from_prompts(
+        decoder_session=decoder_session,
+        image=image,
+        image_embedding=image_embedding,
+        prompts=[dict(points=points, point_labels=point_labels)],
+    )[0]
+
+
+def _compute_masks_from_prompts(decoder_session, image, image_embedding, prompts):
+    prompts = [_get_points_from_prompt(prompt) for prompt in prompts]
+    num_points = max(len(points) for points, _ in prompts)
 
     # batch_size, num_queries, num_points, 2
-    batched_point_coords = input_point[None, None, :, :]
+    batched_point_coords = np.zeros((1, len(prompts), num_points, 2), dtype=np.float32)
     # batch_size, num_queries, num_points
-    batched_point_labels = input_label[None, None, :]
+    batched_point_labels = np.full((1, len(prompts), num_points), -1, dtype=np.float32)
+    for i, (points, point_labels) in enumerate(prompts):
+        batched_point_coords[0, i, : len(points)] = points
+        batched_point_labels[0, i, : len(point_labels)] = point_labels
 
     decoder_inputs = {
         "image_embeddings": image_embedding,
@@ -87,14 +180,14 @@ def _compute_mask_from_points(
     }
 
     masks, _, _ = decoder_session.run(None, decoder_inputs)
-    mask = masks[0, 0, 0, :, :]  # (1, 1, 3, H, W) -> (H, W)
-    mask = mask > 0.0
+    masks = masks[0, :, 0, :, :] > 0.0  # (1, N, 3, H, W) -> (N, H, W)
 
     MIN_SIZE_RATIO = 0.05
-    skimage.morphology.remove_small_objects(
-        mask, min_size=mask.sum() * MIN_SIZE_RATIO, out=mask
-    )
+    for mask in masks:
+        skimage.morphology.remove_small_objects(
+            mask, min_size=mask.sum() * MIN_SIZE_RATIO, out=mask
+        )
 
     if 0:
-        imgviz.io.imsave("mask.jpg", imgviz.label2rgb(mask, imgviz.rgb2gray(image)))
-    return mask
+        imgviz.io.imsave("mask.jpg", imgviz.label2rgb(masks[0], imgviz.rgb2gray(image)))
+    return list(masks)
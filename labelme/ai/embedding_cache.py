@@ -0,0 +1,181 @@
+import collections
+import hashlib
+import os
+import os.path as osp
+import tempfile
+import threading
+
+import numpy as np
+
+from ..logger import logger
+
+
+def get_image_hash(image: np.ndarray) -> str:
+    image = np.ascontiguousarray(image)
+    sha1 = hashlib.sha1()
+    sha1.update(repr((image.shape, image.dtype.str)).encode())
+    sha1.update(image.data)
+    return sha1.hexdigest()
+
+
+class MemoryEmbeddingCache:
+    """Image embeddings kept in memory with LRU eviction by count.
+
+    Keys are expected to be digests (e.g., by get_image_hash) so that
+    the cache does not hold copies of the images.
+    """
+
+    def __init__(self, max_entries=10):
+        self._max_entries = max_entries
+        self._embeddings = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._embeddings)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._embeddings
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(embedding.nbytes for embedding in self._embeddings.values())
+
+    def get(self, key: str):
+        with self._lock:
+            embedding = self._embeddings.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._embeddings.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        with self._lock:
+            self._embeddings[key] = embedding
+            self._embeddings.move_to_end(key)
+            while len(self._embeddings) > self._max_entries:
+                self._embeddings.popitem(last=False)
+
+    def stats(self) -> dict:
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            entries=len(self),
+            nbytes=self.nbytes,
+        )
+
+
+class DiskEmbeddingCache:
+    """Image embeddings saved as .npy files with LRU eviction by size.
+
+    Files are keyed by the model name and the hash of the image content,
+    and their modification time is updated on access to track the LRU order.
+    """
+
+    def __init__(self, cache_dir=None, max_size_mb=2048):
+        if cache_dir is None:
+            cache_dir = osp.join(osp.expanduser("~"), ".cache/labelme/embeddings")
+        self._cache_dir = osp.expanduser(cache_dir)
+        self._max_size = max_size_mb * 1024**2
+        self._lock = threading.Lock()
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+
+    def get_key(self, model_name: str, image_hash: str) -> str:
+        return "{}-{}".format(model_name, image_hash)
+
+    def _get_path(self, key: str) -> str:
+        return osp.join(self._cache_dir, key + ".npy")
+
+    def get(self, key: str):
+        path = self._get_path(key)
+        try:
+            embedding = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        logger.debug("Loaded image embedding from cache: {}".format(path))
+        return embedding
+
+    def put(self, key: str, embedding: np.ndarray) -> None:
+        if embedding.nbytes > self._max_size:
+            return
+
+        path = self._get_path(key)
+        try:
+            # write to a temporary file first so that readers never see
+            # a partially written file
+            fd, tmp_path = tempfile.mkstemp(suffix=".npy.tmp", dir=self._cache_dir)
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, embedding)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Failed to save image embedding to cache: {}".format(e))
+            return
+
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self._cache_dir):
+                if not entry.name.endswith(".npy"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            size = sum(entry[1] for entry in entries)
+            for _, file_size, path in sorted(entries):
+                if size <= self._max_size:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                size -= file_size
+
+
+class EmbeddingPrefetcher:
+    """Computes embeddings of upcoming images in a background thread.
+
+    Each submit replaces the pending images, so the queue always follows
+    the image the user is currently working on.
+    """
+
+    def __init__(self, prefetch_fn):
+        self._prefetch_fn = prefetch_fn
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, image_loaders) -> None:
+        with self._condition:
+            self._queue.clear()
+            self._queue.extend(image_loaders)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                load_image = self._queue.popleft()
+
+            try:
+                image = load_image()
+                if image is not None:
+                    self._prefetch_fn(image)
+            except Exception as e:
+                logger.warning("Failed to prefetch image embedding: {}".format(e))
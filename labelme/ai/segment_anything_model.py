@@ -1,4 +1,4 @@
-import collections
+import os.path as osp
 import threading
 
 import imgviz
@@ -8,50 +8,107 @@ import skimage
 
 from ..logger import logger
 from . import _utils
+from .embedding_cache import EmbeddingPrefetcher
+from .embedding_cache import MemoryEmbeddingCache
+from .embedding_cache import get_image_hash
 
 
 class SegmentAnythingModel:
-    def __init__(self, encoder_path, decoder_path):
+    def __init__(self, encoder_path, decoder_path, embedding_cache=None):
         self._image_size = 1024
 
         self._encoder_session = onnxruntime.InferenceSession(encoder_path)
         self._decoder_session = onnxruntime.InferenceSession(decoder_path)
 
         self._lock = threading.Lock()
-        self._image_embedding_cache = collections.OrderedDict()
+        self._encoder_lock = threading.Lock()
+        self._image_embedding_cache = MemoryEmbeddingCache(max_entries=10)
+
+        self._disk_embedding_cache = embedding_cache
+        self._model_name = osp.splitext(osp.basename(encoder_path))[0]
 
         self._thread = None
+        self._prefetcher = EmbeddingPrefetcher(self._prefetch_image_embedding)
 
-    def set_image(self, image: np.ndarray):
+    def set_image(self, image: np.ndarray, image_embedding=None):
+        """Set the image, with its embedding if already computed for it."""
+        image_hash = get_image_hash(image)
         with self._lock:
             self._image = image
-            self._image_embedding = self._image_embedding_cache.get(
-                self._image.tobytes()
-            )
+            self._image_hash = image_hash
+            if image_embedding is None:
+                image_embedding = self._image_embedding_cache.get(image_hash)
+            self._image_embedding = image_embedding
 
         if self._image_embedding is None:
             self._thread = threading.Thread(
-                target=self._compute_and_cache_image_embedding
+                target=self._compute_and_cache_image_embedding,
+                args=(image, image_hash),
             )
             self._thread.start()
+        else:
+            self._thread = None
+
+    def compute_image_embedding(self, image: np.ndarray):
+        """Compute the embedding into the cache without changing the image."""
+        return self._get_or_compute_image_embedding(
+            image=image, image_hash=get_image_hash(image)
+        )
+
+    def prefetch_images(self, image_loaders):
+        self._prefetcher.submit(image_loaders)
+
+    def _prefetch_image_embedding(self, image: np.ndarray):
+        # wait for the current image so that it is never delayed by prefetching
+        thread = self._thread
+        if thread is not None:
+            thread.join()
+        self.compute_image_embedding(image=image)
 
-    def _compute_and_cache_image_embedding(self):
+    def _compute_and_cache_image_embedding(self, image, image_hash):
+        image_embedding = self._get_or_compute_image_embedding(
+            image=image, image_hash=image_hash
+        )
         with self._lock:
-            logger.debug("Computing image embedding...")
-            self._image_embedding = _compute_image_embedding(
-                image_size=self._image_size,
-                encoder_session=self._encoder_session,
-                image=self._image,
+            # the image may have been changed while computing
+            if self._image_hash == image_hash:
+                self._image_embedding = image_embedding
+
+    def _get_or_compute_image_embedding(self, image, image_hash):
+        with self._encoder_lock:
+            # may have been computed by prefetching while waiting for the lock
+            if image_hash in self._image_embedding_cache:
+                return self._image_embedding_cache.get(image_hash)
+
+            image_embedding = None
+            disk_cache_key = None
+            if self._disk_embedding_cache is not None:
+                disk_cache_key = self._disk_embedding_cache.get_key(
+                    model_name=self._model_name, image_hash=image_hash
+                )
+                image_embedding = self._disk_embedding_cache.get(disk_cache_key)
+
+            if image_embedding is None:
+                logger.debug("Computing image embedding...")
+                image_embedding = _compute_image_embedding(
+                    image_size=self._image_size,
+                    encoder_session=self._encoder_session,
+                    image=image,
+                )
+                if disk_cache_key is not None:
+                    self._disk_embedding_cache.put(disk_cache_key, image_embedding)
+                logger.debug("Done computing image embedding.")
+
+            self._image_embedding_cache.put(image_hash, image_embedding)
+            logger.debug(
+                "Image embedding cache: {}".format(self._image_embedding_cache.stats())
             )
-            if len(self._image_embedding_cache) > 10:
-                self._image_embedding_cache.popitem(last=False)
-            self._image_embedding_cache[self._image.tobytes()] = self._image_embedding
-            logger.debug("Done computing image embedding.")
+            return image_embedding
 
     def _get_image_embedding(self):
-        if self._thread is not None:
-            self._thread.join()
-            self._thread = None
+        thread = self._thread
+        if thread is not None:
+            thread.join()
         with self._lock:
             return self._image_embedding
 
@@ -65,6 +122,33 @@ class SegmentAnythingModel:
             point_labels=point_labels,
         )
 
+    def predict_masks_from_prompts(self, prompts):
+        """Predict masks for prompts.
+
+        Each prompt is either dict(points=..., point_labels=...) or
+        dict(box=[x1, y1, x2, y2]). The exported decoder takes a single
+        prompt, so they are decoded one by one with the shared embedding.
+        """
+        image_embedding = self._get_image_embedding()
+        masks = []
+        for prompt in prompts:
+            if "box" in prompt:
+                x1, y1, x2, y2 = prompt["box"]
+                points, point_labels = [[x1, y1], [x2, y2]], [2, 3]
+            else:
+                points, point_labels = prompt["points"], prompt["point_labels"]
+            masks.append(
+                _compute_mask_from_points(
+                    image_size=self._image_size,
+                    decoder_session=self._decoder_session,
+                    image=self._image,
+                    image_embedding=image_embedding,
+                    points=points,
+                    point_labels=point_labels,
+                )
+            )
+        return masks
+
     def predict_polygon_from_points(self, points, point_labels):
         mask = self.predict_mask_from_points(points=points, point_labels=point_labels)
         return _utils.compute_polygon_from_mask(mask=mask)
@@ -125,12 +209,17 @@ def _compute_mask_from_points(
     input_point = np.array(points, dtype=np.float32)
     input_label = np.array(point_labels, dtype=np.int32)
 
-    onnx_coord = np.concatenate([input_point, np.array([[0.0, 0.0]])], axis=0)[
-        None, :, :
-    ]
-    onnx_label = np.concatenate([input_label, np.array([-1])], axis=0)[None, :].astype(
-        np.float32
-    )
+    if 2 in point_labels:
+        # box corners are given, so no padding point is needed
+        onnx_coord = input_point[None, :, :]
+        onnx_label = input_label[None, :].astype(np.float32)
+    else:
+        onnx_coord = np.concatenate([input_point, np.array([[0.0, 0.0]])], axis=0)[
+            None, :, :
+        ]
+        onnx_label = np.concatenate([input_label, np.array([-1])], axis=0)[
+            None, :
+        ].astype(np.float32)
 
     scale, new_height, new_width = _compute_scale_to_resize_image(
         image_size=image_size, image=image
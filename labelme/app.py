@@ -6,10 +6,10 @@ import math
 import os
 import os.path as osp
 import re
+import time
 import webbrowser
 
 import imgviz
-import natsort
 import numpy as np
 from qtpy import QtCore
 from qtpy import QtGui
@@ -24,17 +24,22 @@ from labelme.config import get_config
 from labelme.label_file import LabelFile
 from labelme.label_file import LabelFileError
 from labelme.logger import logger
+from labelme.read_ahead_cache import ReadAheadCache
 from labelme.shape import Shape
 from labelme.widgets import AiPromptWidget
 from labelme.widgets import BrightnessContrastDialog
 from labelme.widgets import Canvas
 from labelme.widgets import FileDialogPreview
+from labelme.widgets import FileListWidget
+from labelme.widgets import ImageFileScanner
+from labelme.widgets import ImagePyramid
 from labelme.widgets import LabelDialog
 from labelme.widgets import LabelListWidget
 from labelme.widgets import LabelListWidgetItem
 from labelme.widgets import ToolBar
 from labelme.widgets import UniqueLabelQListWidget
 from labelme.widgets import ZoomWidget
+from labelme.widgets.file_list_widget import iter_image_files
 
 from . import utils
 
@@ -148,7 +153,22 @@ class MainWindow(QtWidgets.QMainWindow):
         self.fileSearch = QtWidgets.QLineEdit()
         self.fileSearch.setPlaceholderText(self.tr("Search Filename"))
         self.fileSearch.textChanged.connect(self.fileSearchChanged)
-        self.fileListWidget = QtWidgets.QListWidget()
+        self._fileSearchTimer = QtCore.QTimer(self)
+        self._fileSearchTimer.setSingleShot(True)
+        self._fileSearchTimer.setInterval(200)
+        self._fileSearchTimer.timeout.connect(self._filterFileList)
+        self.fileListWidget = FileListWidget(get_label_file=self._getLabelFileOfImage)
+        self._imageFileScanner = ImageFileScanner(self)
+        self._imageFileScanner.filesFound.connect(self._importScannedImageFiles)
+        self._imageFileScanner.finished.connect(
+            lambda: self.status(self.tr("Found %d images") % len(self.imageList))
+        )
+        self._importDirLoad = False
+        self._readAheadCache = ReadAheadCache(
+            load_fn=self._readFile,
+            stamp_fn=self._getFileStamp,
+            max_size_mb=self._config["read_ahead"]["max_size_mb"],
+        )
         self.fileListWidget.itemSelectionChanged.connect(self.fileSelectionChanged)
         fileListLayout = QtWidgets.QVBoxLayout()
         fileListLayout.setContentsMargins(0, 0, 0, 0)
@@ -169,6 +189,8 @@ class MainWindow(QtWidgets.QMainWindow):
             double_click=self._config["canvas"]["double_click"],
             num_backups=self._config["canvas"]["num_backups"],
             crosshair=self._config["canvas"]["crosshair"],
+            ai_embedding_cache=self._config["ai"]["embedding_cache"],
+            tiled_image=self._config["canvas"]["tiled_image"],
         )
         self.canvas.zoomRequest.connect(self.zoomRequest)
         self.canvas.mouseMoved.connect(
@@ -869,13 +891,14 @@ class MainWindow(QtWidgets.QMainWindow):
         }  # key=filename, value=scroll_value
 
         if filename is not None and osp.isdir(filename):
-            self.importDirImages(filename, load=False)
+            # the first image is loaded when it is found by the scanner
+            self.importDirImages(filename)
         else:
             self.filename = filename
 
         if config["file_search"]:
             self.fileSearch.setText(config["file_search"])
-            self.fileSearchChanged()
+            self._filterFileList()
 
         # XXX: Could be completely declarative.
         # Restore application settings.
@@ -1003,22 +1026,14 @@ class MainWindow(QtWidgets.QMainWindow):
         texts = self._ai_prompt_widget.get_text_prompt().split(",")
         boxes, scores, labels = ai.get_rectangles_from_texts(
             model="yoloworld",
-            image=utils.img_qt_to_arr(self.image)[:, :, :3],
+            image=utils.img_qt_to_arr(self._getFullImage())[:, :, :3],
             texts=texts,
         )
 
         for shape in self.canvas.shapes:
             if shape.shape_type != "rectangle" or shape.label not in texts:
                 continue
-            box = np.array(
-                [
-                    shape.points[0].x(),
-                    shape.points[0].y(),
-                    shape.points[1].x(),
-                    shape.points[1].y(),
-                ],
-                dtype=np.float32,
-            )
+            box = shape.coords[:2].ravel().astype(np.float32)
             boxes = np.r_[boxes, [box]]
             scores = np.r_[scores, [1.01]]
             labels = np.r_[labels, [texts.index(shape.label)]]
@@ -1051,9 +1066,10 @@ class MainWindow(QtWidgets.QMainWindow):
                 shape_type=shape_dict["shape_type"],
                 description=shape_dict["description"],
             )
-            for point in shape_dict["points"]:
-                shape.addPoint(QtCore.QPointF(*point))
+            shape.addPoints(shape_dict["points"])
             shapes.append(shape)
+        # in the AI create modes, the rectangles are converted in one pass
+        self.canvas.refineRectanglesByAiModel(shapes)
 
         self.canvas.storeShapes()
         self.loadShapes(shapes, replace=False)
@@ -1269,26 +1285,28 @@ class MainWindow(QtWidgets.QMainWindow):
             self.uniqLabelList.setItemLabel(item, shape.label, rgb)
 
     def fileSearchChanged(self):
-        self.importDirImages(
-            self.lastOpenDir,
-            pattern=self.fileSearch.text(),
-            load=False,
-        )
+        # filter after typing pauses, as each filter resets the list
+        self._fileSearchTimer.start()
+
+    def _filterFileList(self):
+        self._fileSearchTimer.stop()
+        self.fileListWidget.setFilterPattern(self.fileSearch.text())
+        row = self.fileListWidget.row(self.filename)
+        if row >= 0:
+            # keep the current file selected without reloading it
+            self.fileListWidget.blockSignals(True)
+            self.fileListWidget.setCurrentRow(row)
+            self.fileListWidget.blockSignals(False)
 
     def fileSelectionChanged(self):
-        items = self.fileListWidget.selectedItems()
-        if not items:
+        filenames = self.fileListWidget.selectedFilenames()
+        if not filenames:
             return
-        item = items[0]
 
         if not self.mayContinue():
             return
 
-        currIndex = self.imageList.index(str(item.text()))
-        if currIndex < len(self.imageList):
-            filename = self.imageList[currIndex]
-            if filename:
-                self.loadFile(filename)
+        self.loadFile(filenames[0])
 
     # React to canvas signals.
     def shapeSelectionChanged(self, selected_shapes):
@@ -1299,9 +1317,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.canvas.selectedShapes = selected_shapes
         for shape in self.canvas.selectedShapes:
             shape.selected = True
-            item = self.labelList.findItemByShape(shape)
-            self.labelList.selectItem(item)
-            self.labelList.scrollToItem(item)
+        items = [self.labelList.findItemByShape(shape) for shape in selected_shapes]
+        self.labelList.selectItems(items)
+        if items:
+            self.labelList.scrollToItem(items[-1])
         self._noSelectionSlot = False
         n_selected = len(selected_shapes)
         self.actions.delete.setEnabled(n_selected)
@@ -1310,36 +1329,57 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.edit.setEnabled(n_selected)
 
     def addLabel(self, shape):
-        if shape.group_id is None:
-            text = shape.label
-        else:
-            text = "{} ({})".format(shape.label, shape.group_id)
-        label_list_item = LabelListWidgetItem(text, shape)
-        self.labelList.addItem(label_list_item)
-        if self.uniqLabelList.findItemByLabel(shape.label) is None:
-            item = self.uniqLabelList.createItemFromLabel(shape.label)
-            self.uniqLabelList.addItem(item)
-            rgb = self._get_rgb_by_label(shape.label)
-            self.uniqLabelList.setItemLabel(item, shape.label, rgb)
-        self.labelDialog.addLabelHistory(shape.label)
-        for action in self.actions.onShapesPresent:
-            action.setEnabled(True)
+        self.addLabels([shape])
+
+    def addLabels(self, shapes):
+        """Add the shapes to the label list at once."""
+        # label -> colors of shapes, which are shared by the shapes
+        shape_colors = {}
+        for label in dict.fromkeys(shape.label for shape in shapes):
+            if self.uniqLabelList.findItemByLabel(label) is None:
+                item = self.uniqLabelList.createItemFromLabel(label)
+                self.uniqLabelList.addItem(item)
+                rgb = self._get_rgb_by_label(label)
+                self.uniqLabelList.setItemLabel(item, label, rgb)
+            self.labelDialog.addLabelHistory(label)
+            shape_colors[label] = self._get_shape_colors(label)
+        if shapes:
+            for action in self.actions.onShapesPresent:
+                action.setEnabled(True)
 
-        self._update_shape_color(shape)
-        label_list_item.setText(
-            '{} <font color="#{:02x}{:02x}{:02x}">●</font>'.format(
-                html.escape(text), *shape.fill_color.getRgb()[:3]
+        label_list_items = []
+        for shape in shapes:
+            if shape.group_id is None:
+                text = shape.label
+            else:
+                text = "{} ({})".format(shape.label, shape.group_id)
+            self._update_shape_color(shape, colors=shape_colors[shape.label])
+            label_list_items.append(
+                LabelListWidgetItem(
+                    '{} <font color="#{:02x}{:02x}{:02x}">●</font>'.format(
+                        html.escape(text), *shape.fill_color.getRgb()[:3]
+                    ),
+                    shape,
+                )
             )
-        )
+        self.labelList.addItems(label_list_items)
+
+    def _update_shape_color(self, shape, colors=None):
+        if colors is None:
+            colors = self._get_shape_colors(shape.label)
+        for name, color in colors.items():
+            setattr(shape, name, color)
 
-    def _update_shape_color(self, shape):
-        r, g, b = self._get_rgb_by_label(shape.label)
-        shape.line_color = QtGui.QColor(r, g, b)
-        shape.vertex_fill_color = QtGui.QColor(r, g, b)
-        shape.hvertex_fill_color = QtGui.QColor(255, 255, 255)
-        shape.fill_color = QtGui.QColor(r, g, b, 128)
-        shape.select_line_color = QtGui.QColor(255, 255, 255)
-        shape.select_fill_color = QtGui.QColor(r, g, b, 155)
+    def _get_shape_colors(self, label):
+        r, g, b = self._get_rgb_by_label(label)
+        return dict(
+            line_color=QtGui.QColor(r, g, b),
+            vertex_fill_color=QtGui.QColor(r, g, b),
+            hvertex_fill_color=QtGui.QColor(255, 255, 255),
+            fill_color=QtGui.QColor(r, g, b, 128),
+            select_line_color=QtGui.QColor(255, 255, 255),
+            select_fill_color=QtGui.QColor(r, g, b, 155),
+        )
 
     def _get_rgb_by_label(self, label):
         if self._config["shape_color"] == "auto":
@@ -1363,14 +1403,13 @@ class MainWindow(QtWidgets.QMainWindow):
         return (0, 255, 0)
 
     def remLabels(self, shapes):
-        for shape in shapes:
-            item = self.labelList.findItemByShape(shape)
-            self.labelList.removeItem(item)
+        self.labelList.removeItems(
+            [self.labelList.findItemByShape(shape) for shape in shapes]
+        )
 
     def loadShapes(self, shapes, replace=True):
         self._noSelectionSlot = True
-        for shape in shapes:
-            self.addLabel(shape)
+        self.addLabels(shapes)
         self.labelList.clearSelection()
         self._noSelectionSlot = False
         self.canvas.loadShapes(shapes, replace=replace)
@@ -1397,8 +1436,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 description=description,
                 mask=shape["mask"],
             )
-            for x, y in points:
-                shape.addPoint(QtCore.QPointF(x, y))
+            shape.addPoints(points)
             shape.close()
 
             default_flags = {}
@@ -1430,7 +1468,7 @@ class MainWindow(QtWidgets.QMainWindow):
             data.update(
                 dict(
                     label=s.label.encode("utf-8") if PY2 else s.label,
-                    points=[(p.x(), p.y()) for p in s.points],
+                    points=s.coords.tolist(),
                     group_id=s.group_id,
                     description=s.description,
                     shape_type=s.shape_type,
@@ -1465,11 +1503,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 flags=flags,
             )
             self.labelFile = lf
-            items = self.fileListWidget.findItems(self.imagePath, Qt.MatchExactly)
-            if len(items) > 0:
-                if len(items) != 1:
-                    raise RuntimeError("There are duplicate files.")
-                items[0].setCheckState(Qt.Checked)
+            self.fileListWidget.setChecked(self.imagePath, True)
             # disable allows next and previous image to proceed
             # self.filename = filename
             return True
@@ -1481,8 +1515,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def duplicateSelectedShape(self):
         added_shapes = self.canvas.duplicateSelectedShapes()
-        for shape in added_shapes:
-            self.addLabel(shape)
+        self.addLabels(added_shapes)
         self.setDirty()
 
     def pasteSelectedShape(self):
@@ -1620,11 +1653,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.keepPrevScale.setChecked(enabled)
 
     def onNewBrightnessContrast(self, qimage):
-        self.canvas.loadPixmap(QtGui.QPixmap.fromImage(qimage), clear_shapes=False)
+        self.canvas.loadImage(qimage, clear_shapes=False)
 
     def brightnessContrast(self, value):
         dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
+            self._getFullImage(),
             self.onNewBrightnessContrast,
             parent=self,
         )
@@ -1651,10 +1684,9 @@ class MainWindow(QtWidgets.QMainWindow):
     def loadFile(self, filename=None):
         """Load the specified file, or the last opened file if None."""
         # changing fileListWidget loads file
-        if filename in self.imageList and (
-            self.fileListWidget.currentRow() != self.imageList.index(filename)
-        ):
-            self.fileListWidget.setCurrentRow(self.imageList.index(filename))
+        row = self.fileListWidget.row(filename)
+        if row >= 0 and self.fileListWidget.currentRow() != row:
+            self.fileListWidget.setCurrentRow(row)
             self.fileListWidget.repaint()
             return
 
@@ -1671,13 +1703,11 @@ class MainWindow(QtWidgets.QMainWindow):
             return False
         # assumes same name, but json extension
         self.status(str(self.tr("Loading %s...")) % osp.basename(str(filename)))
-        label_file = osp.splitext(filename)[0] + ".json"
-        if self.output_dir:
-            label_file_without_path = osp.basename(label_file)
-            label_file = osp.join(self.output_dir, label_file_without_path)
-        if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
+        label_file = self._getLabelFileOfImage(filename)
+        read_ahead = self._readAheadCache.pop(filename)
+        if read_ahead is None:
             try:
-                self.labelFile = LabelFile(label_file)
+                read_ahead, _ = self._readFile(filename)
             except LabelFileError as e:
                 self.errorMessage(
                     self.tr("Error opening file"),
@@ -1689,18 +1719,9 @@ class MainWindow(QtWidgets.QMainWindow):
                 )
                 self.status(self.tr("Error reading %s") % label_file)
                 return False
-            self.imageData = self.labelFile.imageData
-            self.imagePath = osp.join(
-                osp.dirname(label_file),
-                self.labelFile.imagePath,
-            )
+        self.labelFile, self.imageData, self.imagePath, image = read_ahead
+        if self.labelFile:
             self.otherData = self.labelFile.otherData
-        else:
-            self.imageData = LabelFile.load_image_file(filename)
-            if self.imageData:
-                self.imagePath = filename
-            self.labelFile = None
-        image = QtGui.QImage.fromData(self.imageData)
 
         if image.isNull():
             formats = [
@@ -1720,7 +1741,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.filename = filename
         if self._config["keep_prev"]:
             prev_shapes = self.canvas.shapes
-        self.canvas.loadPixmap(QtGui.QPixmap.fromImage(image))
+        self.canvas.loadImage(image)
         flags = {k: False for k in self._config["flags"] or []}
         if self.labelFile:
             self.loadLabels(self.labelFile.shapes)
@@ -1747,11 +1768,6 @@ class MainWindow(QtWidgets.QMainWindow):
                     orientation, self.scroll_values[orientation][self.filename]
                 )
         # set brightness contrast values
-        dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
-            self.onNewBrightnessContrast,
-            parent=self,
-        )
         brightness, contrast = self.brightnessContrast_values.get(
             self.filename, (None, None)
         )
@@ -1763,20 +1779,108 @@ class MainWindow(QtWidgets.QMainWindow):
             _, contrast = self.brightnessContrast_values.get(
                 self.recentFiles[0], (None, None)
             )
-        if brightness is not None:
-            dialog.slider_brightness.setValue(brightness)
-        if contrast is not None:
-            dialog.slider_contrast.setValue(contrast)
         self.brightnessContrast_values[self.filename] = (brightness, contrast)
-        if brightness is not None or contrast is not None:
-            dialog.onNewValue(None)
+        image = BrightnessContrastDialog.adjustImage(
+            self.image, brightness=brightness, contrast=contrast
+        )
+        if image is not self.image:
+            self.onNewBrightnessContrast(image)
         self.paintCanvas()
         self.addRecentFile(self.filename)
         self.toggleActions(True)
         self.canvas.setFocus()
+        # read ahead first, so the AI prefetch takes the images being read
+        self.readAheadFiles()
+        self.prefetchAiImages()
         self.status(str(self.tr("Loaded %s")) % osp.basename(str(filename)))
         return True
 
+    def readAheadFiles(self):
+        num_images = self._config["read_ahead"]["num_images"]
+        index = self.fileListWidget.row(self.filename)
+        if not num_images or index < 0:
+            return
+        filenames = self.imageList[index + 1 : index + 1 + num_images]
+        filenames += self.imageList[max(index - num_images, 0) : index][::-1]
+        self._readAheadCache.prefetch(filenames)
+        logger.debug(
+            "Read ahead cache: hits={}, misses={}, nbytes={}".format(
+                self._readAheadCache.hits,
+                self._readAheadCache.misses,
+                self._readAheadCache.nbytes,
+            )
+        )
+
+    def _readFile(self, filename):
+        # called from worker threads too, so this must not touch the widgets
+        label_file = self._getLabelFileOfImage(filename)
+        if osp.exists(label_file) and LabelFile.is_label_file(label_file):
+            labelFile = LabelFile(label_file)
+            imageData = labelFile.imageData
+            imagePath = osp.join(osp.dirname(label_file), labelFile.imagePath)
+        else:
+            labelFile = None
+            imageData = LabelFile.load_image_file(filename)
+            imagePath = filename if imageData else None
+        image = self._decodeImage(imageData)
+        nbytes = len(imageData or b"")
+        if isinstance(image, QtGui.QImage):
+            nbytes += image.bytesPerLine() * image.height()
+        return (labelFile, imageData, imagePath, image), nbytes
+
+    def _decodeImage(self, imageData):
+        if not imageData:
+            return QtGui.QImage()
+        # large images are decoded by tiles when painted, so the full image is
+        # not held in memory (e.g., by the read ahead)
+        tiled_image = self._config["canvas"]["tiled_image"]
+        if tiled_image["min_size"]:
+            image = ImagePyramid(imageData, max_size_mb=tiled_image["max_size_mb"])
+            if max(image.width(), image.height()) >= tiled_image["min_size"]:
+                return image
+        t_start = time.time()
+        image = QtGui.QImage.fromData(imageData)
+        logger.debug("Decoded image in {:.3f}s".format(time.time() - t_start))
+        return image
+
+    def _getFullImage(self):
+        if isinstance(self.image, ImagePyramid):
+            return self.image.toImage()
+        return self.image
+
+    def _getFileStamp(self, filename):
+        stamp = []
+        for path in [filename, self._getLabelFileOfImage(filename)]:
+            try:
+                stamp.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return stamp
+
+    def prefetchAiImages(self):
+        num_images = self._config["ai"]["prefetch"]
+        index = self.fileListWidget.row(self.filename)
+        if not num_images or index < 0:
+            self.canvas.prefetchAiImages([])
+            return
+        filenames = self.imageList[index + 1 : index + 1 + num_images]
+        filenames += self.imageList[max(index - 1, 0) : index]
+        self.canvas.prefetchAiImages(
+            [functools.partial(self._readAiImage, filename) for filename in filenames]
+        )
+
+    def _readAiImage(self, filename):
+        # called from a worker thread, and shares the decoded image with the
+        # read ahead, so the image is loaded once for both
+        if self._config["read_ahead"]["num_images"]:
+            _, _, _, image = self._readAheadCache.get(filename)
+        else:
+            # not kept in the read ahead when it is disabled
+            (_, _, _, image), _ = self._readFile(filename)
+        if isinstance(image, ImagePyramid):
+            return image.toImage()
+        return image
+
     def resizeEvent(self, event):
         if (
             self.canvas
@@ -1871,7 +1975,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.filename is None:
             return
 
-        currIndex = self.imageList.index(self.filename)
+        currIndex = self.fileListWidget.row(self.filename)
         if currIndex - 1 >= 0:
             filename = self.imageList[currIndex - 1]
             if filename:
@@ -1896,7 +2000,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.filename is None:
             filename = self.imageList[0]
         else:
-            currIndex = self.imageList.index(self.filename)
+            currIndex = self.fileListWidget.row(self.filename)
             if currIndex + 1 < len(self.imageList):
                 filename = self.imageList[currIndex + 1]
             else:
@@ -1959,13 +2063,12 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         self.statusBar().show()
 
-        current_filename = self.filename
-        self.importDirImages(self.lastOpenDir, load=False)
+        self._readAheadCache.clear()
+        self.fileListWidget.refreshLabelFiles()
 
-        if current_filename in self.imageList:
-            # retain currently selected file
-            self.fileListWidget.setCurrentRow(self.imageList.index(current_filename))
-            self.fileListWidget.repaint()
+        if self.fileListWidget.row(self.filename) >= 0 and self.mayContinue():
+            # reload annotations of the current file from the new directory
+            self.loadFile(self.filename)
 
     def saveFile(self, _value=False):
         assert not self.image.isNull(), "cannot save empty image"
@@ -2048,8 +2151,7 @@ class MainWindow(QtWidgets.QMainWindow):
             os.remove(label_file)
             logger.info("Label file is removed: {}".format(label_file))
 
-            item = self.fileListWidget.currentItem()
-            item.setCheckState(Qt.Unchecked)
+            self.fileListWidget.setChecked(self.fileListWidget.currentFilename(), False)
 
             self.resetState()
 
@@ -2104,9 +2206,10 @@ class MainWindow(QtWidgets.QMainWindow):
     def removeSelectedPoint(self):
         self.canvas.removeSelectedPoint()
         self.canvas.update()
-        if not self.canvas.hShape.points:
-            self.canvas.deleteShape(self.canvas.hShape)
-            self.remLabels([self.canvas.hShape])
+        shape = self.canvas.hShape
+        if not shape.points:
+            self.canvas.deleteShape(shape)
+            self.remLabels([shape])
             if self.noShapes():
                 for action in self.actions.onShapesPresent:
                     action.setEnabled(False)
@@ -2128,8 +2231,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def copyShape(self):
         self.canvas.endMove(copy=True)
-        for shape in self.canvas.selectedShapes:
-            self.addLabel(shape)
+        self.addLabels(self.canvas.selectedShapes)
         self.labelList.clearSelection()
         self.setDirty()
 
@@ -2160,11 +2262,14 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @property
     def imageList(self):
-        lst = []
-        for i in range(self.fileListWidget.count()):
-            item = self.fileListWidget.item(i)
-            lst.append(item.text())
-        return lst
+        return self.fileListWidget.filenames()
+
+    def _getLabelFileOfImage(self, filename):
+        label_file = osp.splitext(filename)[0] + ".json"
+        if self.output_dir:
+            label_file_without_path = osp.basename(label_file)
+            label_file = osp.join(self.output_dir, label_file_without_path)
+        return label_file
 
     def importDroppedImageFiles(self, imageFiles):
         extensions = [
@@ -2173,20 +2278,9 @@ class MainWindow(QtWidgets.QMainWindow):
         ]
 
         self.filename = None
-        for file in imageFiles:
-            if file in self.imageList or not file.lower().endswith(tuple(extensions)):
-                continue
-            label_file = osp.splitext(file)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(file)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
+        self.fileListWidget.addFilenames(
+            file for file in imageFiles if file.lower().endswith(tuple(extensions))
+        )
 
         if len(self.imageList) > 1:
             self.actions.openNextImg.setEnabled(True)
@@ -2203,39 +2297,25 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.lastOpenDir = dirpath
         self.filename = None
-        self.fileListWidget.clear()
-
-        filenames = self.scanAllImages(dirpath)
-        if pattern:
-            try:
-                filenames = [f for f in filenames if re.search(pattern, f)]
-            except re.error:
-                pass
-        for filename in filenames:
-            label_file = osp.splitext(filename)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(filename)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
-        self.openNextImg(load=load)
-
-    def scanAllImages(self, folderPath):
-        extensions = [
+        self._readAheadCache.clear()
+        self.fileListWidget.setFilenames([])
+
+        if pattern is not None:
+            self.fileListWidget.setFilterPattern(pattern)
+        self._importDirLoad = load
+        self.status(self.tr("Scanning %s...") % dirpath)
+        self._imageFileScanner.scan(dirpath, extensions=self._getImageExtensions())
+
+    def _importScannedImageFiles(self, filenames):
+        self.fileListWidget.addFilenames(filenames)
+        if self.filename is None and self.imageList:
+            self.openNextImg(load=self._importDirLoad)
+
+    def _getImageExtensions(self):
+        return [
             ".%s" % fmt.data().decode().lower()
             for fmt in QtGui.QImageReader.supportedImageFormats()
         ]
 
-        images = []
-        for root, dirs, files in os.walk(folderPath):
-            for file in files:
-                if file.lower().endswith(tuple(extensions)):
-                    relativePath = os.path.normpath(osp.join(root, file))
-                    images.append(relativePath)
-        images = natsort.os_sorted(images)
-        return images
+    def scanAllImages(self, folderPath):
+        return list(iter_image_files(folderPath, extensions=self._getImageExtensions()))
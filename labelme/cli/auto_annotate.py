@@ -0,0 +1,264 @@
+import argparse
+import collections
+import os
+import os.path as osp
+import queue
+import threading
+import time
+
+import imgviz
+import PIL.Image
+
+from labelme import ai
+from labelme import utils
+from labelme.label_file import LabelFile
+from labelme.logger import logger
+
+_STOP = object()
+
+
+def get_image_files(input_dir):
+    extensions = tuple(
+        ext
+        for ext, format in PIL.Image.registered_extensions().items()
+        if format in PIL.Image.OPEN
+    )
+    image_files = []
+    for root, _, files in os.walk(input_dir):
+        for file in files:
+            if file.lower().endswith(extensions):
+                image_files.append(osp.join(root, file))
+    return sorted(image_files)
+
+
+def get_json_file(image_file, input_dir, out_dir):
+    json_file = osp.splitext(image_file)[0] + ".json"
+    if out_dir is not None:
+        json_file = osp.join(out_dir, osp.relpath(json_file, input_dir))
+    return json_file
+
+
+class _Stage(threading.Thread):
+    def __init__(self, name, process, in_queue, out_queue, stats):
+        super().__init__(name=name, daemon=True)
+        self._process = process
+        self._in_queue = in_queue
+        self._out_queue = out_queue
+        self._stats = stats
+
+    def run(self):
+        while True:
+            item = self._in_queue.get()
+            if item is _STOP:
+                break
+            t_start = time.time()
+            try:
+                item = self._process(item)
+            except Exception as e:
+                logger.error(
+                    "Failed to process {} in {}: {}".format(
+                        item["image_file"], self.name, e
+                    )
+                )
+                self._stats["failed"] += 1
+                item = None
+            self._stats[self.name] += time.time() - t_start
+            if item is not None and self._out_queue is not None:
+                self._out_queue.put(item)
+        if self._out_queue is not None:
+            self._out_queue.put(_STOP)
+
+
+def annotate_images(
+    image_files,
+    input_dir,
+    out_dir,
+    texts,
+    model=None,
+    iou_threshold=0.5,
+    score_threshold=0.1,
+    with_image_data=False,
+    queue_size=4,
+):
+    """Annotate the images in a pipeline of reader, encoder, decoder and writer.
+
+    Each stage runs in its own thread, and the images that fail in a stage
+    are counted in stats["failed"] and skipped by the following stages.
+    """
+
+    def read(item):
+        item["image_data"] = LabelFile.load_image_file(item["image_file"])
+        # RGBA as the canvas gives to the AI models
+        item["image"] = imgviz.asrgba(utils.img_data_to_arr(item["image_data"]))
+        return item
+
+    def encode(item):
+        image = item["image"]
+        boxes, scores, labels = ai.get_rectangles_from_texts(
+            model="yoloworld", image=image[:, :, :3], texts=texts
+        )
+        if len(boxes):
+            boxes, scores, labels = ai.non_maximum_suppression(
+                boxes=boxes,
+                scores=scores,
+                labels=labels,
+                iou_threshold=iou_threshold,
+                score_threshold=score_threshold,
+                max_num_detections=100,
+            )
+        item["shapes"] = ai.get_shapes_from_annotations(
+            boxes=boxes, scores=scores, labels=labels, texts=texts
+        )
+        if model is not None and item["shapes"]:
+            # passed to the decoder, as the cache of the model holds fewer
+            # embeddings than the queues between the stages
+            item["image_embedding"] = model.compute_image_embedding(image=image)
+        return item
+
+    def decode(item):
+        if model is None or not item["shapes"]:
+            return item
+        model.set_image(image=item["image"], image_embedding=item["image_embedding"])
+        masks = model.predict_masks_from_prompts(
+            [
+                dict(box=[x1, y1, x2, y2])
+                for (x1, y1), (x2, y2) in (shape["points"] for shape in item["shapes"])
+            ]
+        )
+        for shape, mask in zip(item["shapes"], masks):
+            points = ai.compute_polygon_from_mask(mask=mask)
+            if len(points) <= 2:
+                continue
+            shape["points"] = points.tolist()
+            shape["shape_type"] = "polygon"
+        return item
+
+    def write(item):
+        json_file = get_json_file(item["image_file"], input_dir, out_dir)
+        os.makedirs(osp.dirname(json_file), exist_ok=True)
+        image = item["image"]
+        LabelFile().save(
+            filename=json_file,
+            shapes=item["shapes"],
+            imagePath=osp.relpath(item["image_file"], osp.dirname(json_file)),
+            imageHeight=image.shape[0],
+            imageWidth=image.shape[1],
+            imageData=item["image_data"] if with_image_data else None,
+        )
+        stats["images"] += 1
+        stats["shapes"] += len(item["shapes"])
+        if stats["images"] % 100 == 0:
+            logger.info(
+                "Annotated {}/{} images".format(stats["images"], len(image_files))
+            )
+
+    stats = collections.Counter()
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(4)]
+    stages = [
+        _Stage("reader", read, queues[0], queues[1], stats),
+        _Stage("encoder", encode, queues[1], queues[2], stats),
+        _Stage("decoder", decode, queues[2], queues[3], stats),
+        _Stage("writer", write, queues[3], None, stats),
+    ]
+
+    t_start = time.time()
+    for stage in stages:
+        stage.start()
+    for image_file in image_files:
+        queues[0].put(dict(image_file=image_file))
+    queues[0].put(_STOP)
+    for stage in stages:
+        stage.join()
+    elapsed_time = time.time() - t_start
+
+    logger.info(
+        "Annotated {} images ({} failed) with {} shapes in {:.1f} [s]: "
+        "{:.2f} images/s".format(
+            stats["images"],
+            stats["failed"],
+            stats["shapes"],
+            elapsed_time,
+            stats["images"] / elapsed_time if elapsed_time > 0 else 0,
+        )
+    )
+    logger.info(
+        "Busy time per stage: {}".format(
+            ", ".join(
+                "{}={:.1f}s".format(stage.name, stats[stage.name]) for stage in stages
+            )
+        )
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Annotate images in a directory with text prompts."
+    )
+    parser.add_argument("input_dir", help="directory of images")
+    parser.add_argument(
+        "--texts", required=True, help="comma separated texts, e.g., dog,cat"
+    )
+    parser.add_argument(
+        "-o",
+        "--out",
+        default=None,
+        help="output directory of json files (default: next to images)",
+    )
+    parser.add_argument(
+        "--model",
+        choices=[model.name for model in ai.MODELS],
+        default=None,
+        help="AI model to refine the detected rectangles into polygons",
+    )
+    parser.add_argument("--iou-threshold", type=float, default=0.5)
+    parser.add_argument("--score-threshold", type=float, default=0.1)
+    parser.add_argument(
+        "--with-image-data",
+        action="store_true",
+        help="store image data in json files",
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="overwrite existing json files"
+    )
+    parser.add_argument(
+        "--queue-size", type=int, default=4, help="size of queues between stages"
+    )
+    args = parser.parse_args()
+
+    texts = [text.strip() for text in args.texts.split(",") if text.strip()]
+
+    image_files = get_image_files(args.input_dir)
+    if not args.overwrite:
+        image_files = [
+            image_file
+            for image_file in image_files
+            if not osp.exists(get_json_file(image_file, args.input_dir, args.out))
+        ]
+    if not image_files:
+        logger.info("No images to annotate in {}".format(args.input_dir))
+        return
+    logger.info("Annotating {} images".format(len(image_files)))
+
+    model = None
+    if args.model is not None:
+        # each embedding is used only once, so they are not cached on disk
+        model = [model for model in ai.MODELS if model.name == args.model][0](
+            embedding_cache=None
+        )
+
+    annotate_images(
+        image_files=image_files,
+        input_dir=args.input_dir,
+        out_dir=args.out,
+        texts=texts,
+        model=model,
+        iou_threshold=args.iou_threshold,
+        score_threshold=args.score_threshold,
+        with_image_data=args.with_image_data,
+        queue_size=args.queue_size,
+    )
+
+
+if __name__ == "__main__":
+    main()
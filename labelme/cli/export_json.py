@@ -1,8 +1,12 @@
 import argparse
 import base64
+import concurrent.futures
+import glob
 import json
 import os
 import os.path as osp
+import re
+import time
 
 import imgviz
 import PIL.Image
@@ -11,50 +15,123 @@ from labelme import utils
 from labelme.logger import logger
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("json_file")
-    parser.add_argument("-o", "--out", default=None)
-    args = parser.parse_args()
+def get_label_name_to_value(label_names):
+    label_name_to_value = {"_background_": 0}
+    for label_name in sorted(label_names):
+        if label_name not in label_name_to_value:
+            label_name_to_value[label_name] = len(label_name_to_value)
+    return label_name_to_value
 
-    json_file = args.json_file
 
-    if args.out is None:
-        out_dir = osp.splitext(osp.basename(json_file))[0]
-        out_dir = osp.join(osp.dirname(json_file), out_dir)
-    else:
-        out_dir = args.out
-    if not osp.exists(out_dir):
-        os.mkdir(out_dir)
+def get_label_names(label_name_to_value):
+    label_names = [None] * (max(label_name_to_value.values()) + 1)
+    for name, value in label_name_to_value.items():
+        label_names[value] = name
+    return label_names
+
+
+def is_up_to_date(json_file, out_dir, label_names):
+    # label_names.txt is written last, so it marks a completed export
+    label_names_file = osp.join(out_dir, "label_names.txt")
+    if not osp.exists(label_names_file):
+        return False
+    if osp.getmtime(label_names_file) < osp.getmtime(json_file):
+        return False
+    with open(label_names_file) as f:
+        return f.read().splitlines() == label_names
+
 
-    data = json.load(open(json_file))
+def load_json_value(json_file, key, chunk_size=2**16):
+    # parse the top-level object only up to the value of key, so the values
+    # after it (e.g., imageData after shapes) are not decoded. They are not
+    # read either if the value ends in the first chunk, otherwise the rest of
+    # the file is read at once.
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"\s*")
+
+    def decode_char(buf, pos):
+        pos = whitespace.match(buf, pos).end()
+        if pos == len(buf):
+            raise json.JSONDecodeError("Expecting value", buf, pos)
+        return buf[pos], pos + 1
+
+    def decode_value(buf, pos):
+        value, end = decoder.raw_decode(buf, whitespace.match(buf, pos).end())
+        # a number may continue in the next chunk, so the value is complete
+        # only when followed by a delimiter
+        delimiter, _ = decode_char(buf, end)
+        if delimiter not in ",:}":
+            raise json.JSONDecodeError("Expecting delimiter", buf, end)
+        return value, end
+
+    with open(json_file) as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def decode(decode_func):
+            nonlocal buf, pos, eof
+            while True:
+                try:
+                    value, pos = decode_func(buf, pos)
+                    return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                # read the rest at once, so a large value is decoded only twice
+                chunk = f.read(chunk_size if not buf else -1)
+                eof = not chunk
+                buf += chunk
+
+        if decode(decode_char) != "{":
+            raise json.JSONDecodeError("Expecting object", buf, 0)
+        while True:
+            name = decode(decode_value)
+            if decode(decode_char) != ":":
+                raise json.JSONDecodeError("Expecting ':' delimiter", buf, pos)
+            value = decode(decode_value)
+            if name == key:
+                return value
+            char = decode(decode_char)
+            if char == "}":
+                raise KeyError(key)
+            if char != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+
+
+def get_json_labels(json_file):
+    shapes = load_json_value(json_file, "shapes")
+    return set(shape["label"] for shape in shapes)
+
+
+def export_json(json_file, out_dir, label_name_to_value=None):
+    with open(json_file) as f:
+        data = json.load(f)
     imageData = data.get("imageData")
 
-    if not imageData:
+    if imageData:
+        imageData = base64.b64decode(imageData)
+    else:
         imagePath = os.path.join(os.path.dirname(json_file), data["imagePath"])
         with open(imagePath, "rb") as f:
             imageData = f.read()
-            imageData = base64.b64encode(imageData).decode("utf-8")
-    img = utils.img_b64_to_arr(imageData)
+    img = utils.img_data_to_arr(imageData)
 
-    label_name_to_value = {"_background_": 0}
-    for shape in sorted(data["shapes"], key=lambda x: x["label"]):
-        label_name = shape["label"]
-        if label_name in label_name_to_value:
-            label_value = label_name_to_value[label_name]
-        else:
-            label_value = len(label_name_to_value)
-            label_name_to_value[label_name] = label_value
+    if label_name_to_value is None:
+        label_name_to_value = get_label_name_to_value(
+            shape["label"] for shape in data["shapes"]
+        )
     lbl, _ = utils.shapes_to_label(img.shape, data["shapes"], label_name_to_value)
 
-    label_names = [None] * (max(label_name_to_value.values()) + 1)
-    for name, value in label_name_to_value.items():
-        label_names[value] = name
+    label_names = get_label_names(label_name_to_value)
 
     lbl_viz = imgviz.label2rgb(
         lbl, imgviz.asgray(img), label_names=label_names, loc="rb"
     )
 
+    if not osp.exists(out_dir):
+        os.makedirs(out_dir)
+
     PIL.Image.fromarray(img).save(osp.join(out_dir, "img.png"))
     utils.lblsave(osp.join(out_dir, "label.png"), lbl)
     PIL.Image.fromarray(lbl_viz).save(osp.join(out_dir, "label_viz.png"))
@@ -63,7 +140,123 @@ def main():
         for lbl_name in label_names:
             f.write(lbl_name + "\n")
 
-    logger.info("Saved to: {}".format(out_dir))
+    return out_dir
+
+
+def get_json_files(path):
+    if osp.isdir(path):
+        json_files = glob.glob(osp.join(path, "**", "*.json"), recursive=True)
+    else:
+        json_files = glob.glob(path, recursive=True)
+    return sorted(json_files)
+
+
+def export_json_files(json_files, out, jobs, force=False):
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        # collect labels of all files first, so label values are consistent
+        # across the dataset
+        all_labels = set()
+        failed_files = set()
+        futures = {
+            executor.submit(get_json_labels, json_file): json_file
+            for json_file in json_files
+        }
+        for future in concurrent.futures.as_completed(futures):
+            json_file = futures[future]
+            try:
+                all_labels.update(future.result())
+            except Exception as e:
+                failed_files.add(json_file)
+                logger.error("Failed to load {}: {}".format(json_file, e))
+        label_name_to_value = get_label_name_to_value(all_labels)
+        label_names = get_label_names(label_name_to_value)
+        logger.info("Label names: {}".format(label_names))
+
+        root_dir = osp.commonpath([osp.dirname(f) for f in json_files])
+
+        tasks = []
+        for json_file in json_files:
+            if json_file in failed_files:
+                continue
+            out_dir = osp.splitext(json_file)[0]
+            if out is not None:
+                out_dir = osp.join(out, osp.relpath(out_dir, root_dir))
+            if not force and is_up_to_date(json_file, out_dir, label_names):
+                continue
+            tasks.append((json_file, out_dir))
+        num_skipped = len(json_files) - len(failed_files) - len(tasks)
+        if num_skipped:
+            logger.info("Skipping {} up-to-date files".format(num_skipped))
+
+        t_start = time.time()
+        num_failed = 0
+        futures = {
+            executor.submit(export_json, json_file, out_dir, label_name_to_value): (
+                json_file
+            )
+            for json_file, out_dir in tasks
+        }
+        for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            json_file = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                num_failed += 1
+                logger.error("Failed to export {}: {}".format(json_file, e))
+            if (i + 1) % 100 == 0 or i + 1 == len(tasks):
+                logger.info("Exported {}/{} files".format(i + 1, len(tasks)))
+    elapsed_time = time.time() - t_start
+
+    logger.info(
+        "Exported {} files ({} failed, {} skipped) in {:.1f} [s]: "
+        "{:.1f} files/s".format(
+            len(tasks) - num_failed,
+            num_failed + len(failed_files),
+            num_skipped,
+            elapsed_time,
+            len(tasks) / elapsed_time if elapsed_time > 0 else 0,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "json_file", help="json file, or directory or glob pattern of json files"
+    )
+    parser.add_argument("-o", "--out", default=None)
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of processes for directory or glob input "
+        "(default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-export files whose outputs are already up to date",
+    )
+    args = parser.parse_args()
+
+    json_file = args.json_file
+
+    if osp.isfile(json_file):
+        if args.out is None:
+            out_dir = osp.splitext(osp.basename(json_file))[0]
+            out_dir = osp.join(osp.dirname(json_file), out_dir)
+        else:
+            out_dir = args.out
+        export_json(json_file, out_dir)
+        logger.info("Saved to: {}".format(out_dir))
+        return
+
+    json_files = get_json_files(json_file)
+    if not json_files:
+        logger.error("No json files found: {}".format(json_file))
+        return
+    export_json_files(json_files, out=args.out, jobs=args.jobs, force=args.force)
 
 
 if __name__ == "__main__":
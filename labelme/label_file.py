@@ -1,8 +1,10 @@
 import base64
 import contextlib
+import functools
 import io
 import json
 import os.path as osp
+import time
 
 import PIL.Image
 
@@ -33,25 +35,60 @@ class LabelFileError(Exception):
 
 class LabelFile(object):
     suffix = ".json"
+    # formats passed to Qt unmodified, without re-encoding
+    _passthrough_formats = ["JPEG", "PNG", "BMP"]
 
-    def __init__(self, filename=None):
+    def __init__(self, filename=None, load_image=True):
         self.shapes = []
         self.imagePath = None
         self.imageData = None
+        self.imageHeight = None
+        self.imageWidth = None
         if filename is not None:
-            self.load(filename)
+            self.load(filename, load_image=load_image)
         self.filename = filename
 
+    @property
+    def imageData(self):
+        # imageData is loaded from imagePath on first access
+        # if the label file was loaded with load_image=False.
+        if self._imageData is None and self._imageDataLoader is not None:
+            self._imageData = self._imageDataLoader()
+            self._imageDataLoader = None
+        return self._imageData
+
+    @imageData.setter
+    def imageData(self, value):
+        self._imageData = value
+        self._imageDataLoader = None
+
     @staticmethod
     def load_image_file(filename):
+        t_start = time.time()
         try:
-            image_pil = PIL.Image.open(filename)
+            with io.open(filename, "rb") as f:
+                image_data = f.read()
+            image_pil = PIL.Image.open(io.BytesIO(image_data))
         except IOError:
             logger.error("Failed opening image file: {}".format(filename))
             return
+        t_read = time.time()
 
         # apply orientation to image according to exif
-        image_pil = utils.apply_exif_orientation(image_pil)
+        image_pil_oriented = utils.apply_exif_orientation(image_pil)
+        t_orient = time.time()
+
+        if (
+            image_pil_oriented is image_pil
+            and image_pil.format in LabelFile._passthrough_formats
+        ):
+            # the file can be decoded by Qt as is, so no need to re-encode
+            logger.debug(
+                "Loaded image file {!r} as is: read={:.3f}s, exif={:.3f}s".format(
+                    filename, t_read - t_start, t_orient - t_read
+                )
+            )
+            return image_data
 
         with io.BytesIO() as f:
             ext = osp.splitext(filename)[1].lower()
@@ -61,11 +98,36 @@ class LabelFile(object):
                 format = "JPEG"
             else:
                 format = "PNG"
-            image_pil.save(f, format=format)
+            image_pil_oriented.save(f, format=format)
             f.seek(0)
-            return f.read()
+            image_data = f.read()
+        logger.debug(
+            "Loaded image file {!r} re-encoded to {}: read={:.3f}s, exif={:.3f}s, "
+            "encode={:.3f}s".format(
+                filename,
+                format,
+                t_read - t_start,
+                t_orient - t_read,
+                time.time() - t_orient,
+            )
+        )
+        return image_data
 
-    def load(self, filename):
+    @staticmethod
+    def _get_image_size(image_file, apply_exif_orientation=False):
+        # PIL.Image.open only parses the header, so the pixels are not decoded
+        with PIL.Image.open(image_file) as image_pil:
+            width, height = image_pil.size
+            if apply_exif_orientation:
+                orientation = utils.get_exif_orientation(image_pil)
+            else:
+                orientation = None
+        # orientations 5-8 transpose the image in utils.apply_exif_orientation
+        if orientation in [5, 6, 7, 8]:
+            height, width = width, height
+        return height, width
+
+    def load(self, filename, load_image=True):
         keys = [
             "version",
             "imageData",
@@ -88,18 +150,30 @@ class LabelFile(object):
             with open(filename, "r") as f:
                 data = json.load(f)
 
+            imageDataLoader = None
             if data["imageData"] is not None:
                 imageData = base64.b64decode(data["imageData"])
                 if PY2 and QT4:
                     imageData = utils.img_data_to_png_data(imageData)
+                imageHeight, imageWidth = self._get_image_size(io.BytesIO(imageData))
             else:
                 # relative path from label file to relative path from cwd
                 imagePath = osp.join(osp.dirname(filename), data["imagePath"])
-                imageData = self.load_image_file(imagePath)
+                if load_image:
+                    imageData = self.load_image_file(imagePath)
+                    imageHeight, imageWidth = self._get_image_size(
+                        io.BytesIO(imageData)
+                    )
+                else:
+                    imageData = None
+                    imageDataLoader = functools.partial(self.load_image_file, imagePath)
+                    imageHeight, imageWidth = self._get_image_size(
+                        imagePath, apply_exif_orientation=True
+                    )
             flags = data.get("flags") or {}
             imagePath = data["imagePath"]
-            self._check_image_height_and_width(
-                base64.b64encode(imageData).decode("utf-8"),
+            self._check_image_height_and_width_with_size(
+                (imageHeight, imageWidth),
                 data.get("imageHeight"),
                 data.get("imageWidth"),
             )
@@ -131,24 +205,33 @@ class LabelFile(object):
         self.shapes = shapes
         self.imagePath = imagePath
         self.imageData = imageData
+        self._imageDataLoader = imageDataLoader
+        self.imageHeight = imageHeight
+        self.imageWidth = imageWidth
         self.filename = filename
         self.otherData = otherData
 
     @staticmethod
     def _check_image_height_and_width(imageData, imageHeight, imageWidth):
-        img_arr = utils.img_b64_to_arr(imageData)
-        if imageHeight is not None and img_arr.shape[0] != imageHeight:
+        image_size = LabelFile._get_image_size(io.BytesIO(base64.b64decode(imageData)))
+        return LabelFile._check_image_height_and_width_with_size(
+            image_size, imageHeight, imageWidth
+        )
+
+    @staticmethod
+    def _check_image_height_and_width_with_size(image_size, imageHeight, imageWidth):
+        if imageHeight is not None and image_size[0] != imageHeight:
             logger.error(
                 "imageHeight does not match with imageData or imagePath, "
                 "so getting imageHeight from actual image."
             )
-            imageHeight = img_arr.shape[0]
-        if imageWidth is not None and img_arr.shape[1] != imageWidth:
+            imageHeight = image_size[0]
+        if imageWidth is not None and image_size[1] != imageWidth:
             logger.error(
                 "imageWidth does not match with imageData or imagePath, "
                 "so getting imageWidth from actual image."
             )
-            imageWidth = img_arr.shape[1]
+            imageWidth = image_size[1]
         return imageHeight, imageWidth
 
     def save(
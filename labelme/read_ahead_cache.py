@@ -0,0 +1,120 @@
+import collections
+import concurrent.futures
+import threading
+
+from labelme.logger import logger
+
+
+class ReadAheadCache:
+    """Loads items ahead of time in a thread pool, keeping them in an LRU.
+
+    load_fn(key) returns (value, nbytes), and stamp_fn(key) returns a value
+    that changes when the source of the item changes (e.g., mtime), which is
+    compared when the item is taken to discard stale items.
+    """
+
+    def __init__(self, load_fn, stamp_fn, max_size_mb=1024, num_workers=2):
+        self._load_fn = load_fn
+        self._stamp_fn = stamp_fn
+        self._max_size = max_size_mb * 1024**2
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="ReadAheadCache"
+        )
+        self._futures = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, key):
+        stamp = self._stamp_fn(key)
+        value, nbytes = self._load_fn(key)
+        return stamp, value, nbytes
+
+    def prefetch(self, keys):
+        with self._lock:
+            for key in list(self._futures):
+                # keep loaded items for LRU, but cancel the ones not started
+                if key not in keys and self._futures[key].cancel():
+                    del self._futures[key]
+            for key in keys:
+                if key in self._futures:
+                    self._futures.move_to_end(key)
+                else:
+                    self._futures[key] = self._executor.submit(self._load, key)
+        self._evict()
+
+    def pop(self, key):
+        """Return the value if it was loaded ahead, or None."""
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is None or future.cancelled():
+            self.misses += 1
+            return None
+
+        try:
+            stamp, value, _ = future.result()
+        except Exception as e:
+            logger.debug("Failed to read ahead {!r}: {}".format(key, e))
+            self.misses += 1
+            return None
+        if stamp != self._stamp_fn(key):
+            logger.debug("Discarding stale read ahead: {!r}".format(key))
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def get(self, key):
+        """Return the value without taking it, loading it if not prefetched."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None or future.cancelled():
+                future = self._futures[key] = self._executor.submit(self._load, key)
+        try:
+            stamp, value, _ = future.result()
+        except concurrent.futures.CancelledError:
+            # cancelled by a prefetch before it started
+            value, _ = self._load_fn(key)
+        else:
+            if stamp != self._stamp_fn(key):
+                value, _ = self._load_fn(key)
+        self._evict()
+        return value
+
+    def discard(self, key):
+        with self._lock:
+            future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def clear(self):
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+        for future in futures:
+            future.cancel()
+
+    def _evict(self):
+        with self._lock:
+            size = 0
+            # newest first, so the oldest ones are evicted
+            for key in reversed(list(self._futures)):
+                future = self._futures[key]
+                if not future.done() or future.cancelled():
+                    continue
+                if future.exception() is not None:
+                    continue
+                size += future.result()[2]
+                if size > self._max_size:
+                    del self._futures[key]
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            futures = list(self._futures.values())
+        return sum(
+            future.result()[2]
+            for future in futures
+            if future.done() and not future.cancelled() and not future.exception()
+        )
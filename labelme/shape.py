@@ -8,8 +8,14 @@ from qtpy import QtGui
 import labelme.utils
 from labelme.logger import logger
 
-# TODO(unknown):
-# - [opt] Store paths instead of creating new ones at each paint.
+
+def _to_coords(points):
+    if len(points) and isinstance(points[0], QtCore.QPointF):
+        points = [(point.x(), point.y()) for point in points]
+    coords = np.array(points, dtype=np.float64).reshape(-1, 2)
+    # edits make new arrays, so that the caches are cleared
+    coords.setflags(write=False)
+    return coords
 
 
 class Shape(object):
@@ -48,6 +54,7 @@ class Shape(object):
         description=None,
         mask=None,
     ):
+        self._clear_cache()
         self.label = label
         self.group_id = group_id
         self.points = []
@@ -78,11 +85,105 @@ class Shape(object):
             # is used for drawing the pending line a different color.
             self.line_color = line_color
 
-    def _scale_point(self, point: QtCore.QPointF) -> QtCore.QPointF:
-        return QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
+    def _clear_cache(self):
+        # geometry in the image coordinates, which changes only by edits
+        self._path = None
+        self._line_path = None
+        self._bounding_rect = None
+        self._mean_edge_length = None
+        # vertices in the widget coordinates, which changes also by scale
+        self._vertex_paths = None
+        self._simplified_line_path = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in [
+            "_points",
+            "_mask_images",
+            "_mask_contour_path",
+            "_path",
+            "_line_path",
+            "_bounding_rect",
+            "_mean_edge_length",
+            "_vertex_paths",
+            "_simplified_line_path",
+        ]:
+            del state[key]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._points = None
+        self.mask = self._mask
+        self._clear_cache()
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @mask.setter
+    def mask(self, value):
+        self._mask = value
+        # rendered in the mask coordinates, so they do not change by scale
+        self._mask_images = {}
+        self._mask_contour_path = None
+
+    def _getMaskImage(self, color):
+        key = color.rgba()
+        if key not in self._mask_images:
+            height, width = self.mask.shape
+            # bool is 0 or 1 in bytes, which indexes the color table
+            data = self.mask.view(np.uint8)
+            if width % 4 or not data.flags.c_contiguous:
+                # scanlines of QImage are aligned to 32 bits
+                data = np.zeros((height, (width + 3) // 4 * 4), dtype=np.uint8)
+                data[:, :width] = self.mask
+            image = QtGui.QImage(
+                data.data, width, height, data.shape[1], QtGui.QImage.Format_Indexed8
+            )
+            image.setColorTable([QtGui.qRgba(0, 0, 0, 0), key])
+            # converted once here instead of at every drawImage
+            self._mask_images[key] = image.convertToFormat(
+                QtGui.QImage.Format_ARGB32_Premultiplied
+            )
+        return self._mask_images[key]
+
+    def _getMaskContourPath(self):
+        if self._mask_contour_path is None:
+            path = QtGui.QPainterPath()
+            for contour in skimage.measure.find_contours(
+                np.pad(self.mask, pad_width=1)
+            ):
+                path.addPolygon(
+                    QtGui.QPolygonF([QtCore.QPointF(x, y) for y, x in contour.tolist()])
+                )
+            self._mask_contour_path = path
+        return self._mask_contour_path
+
+    @property
+    def coords(self):
+        """Read-only float64 array of the points in the shape of (N, 2)."""
+        return self._coords
+
+    @coords.setter
+    def coords(self, value):
+        self._coords = _to_coords(value)
+        self._points = None
+        self._clear_cache()
+
+    @property
+    def points(self):
+        """List of QPointF converted from coords when accessed."""
+        if self._points is None:
+            self._points = [QtCore.QPointF(x, y) for x, y in self._coords.tolist()]
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        self.coords = value
 
     def setShapeRefined(self, shape_type, points, point_labels, mask=None):
-        self._shape_raw = (self.shape_type, self.points, self.point_labels)
+        self._shape_raw = (self.shape_type, self.coords, self.point_labels)
         self.shape_type = shape_type
         self.points = points
         self.point_labels = point_labels
@@ -91,7 +192,7 @@ class Shape(object):
     def restoreShapeRaw(self):
         if self._shape_raw is None:
             return
-        self.shape_type, self.points, self.point_labels = self._shape_raw
+        self.shape_type, self.coords, self.point_labels = self._shape_raw
         self._shape_raw = None
 
     @property
@@ -114,29 +215,50 @@ class Shape(object):
         ]:
             raise ValueError("Unexpected shape_type: {}".format(value))
         self._shape_type = value
+        self._clear_cache()
 
     def close(self):
         self._closed = True
+        self._clear_cache()
 
     def addPoint(self, point, label=1):
-        if self.points and point == self.points[0]:
+        if len(self._coords) and point == self[0]:
             self.close()
         else:
-            self.points.append(point)
+            self.coords = np.vstack([self._coords, [(point.x(), point.y())]])
             self.point_labels.append(label)
 
+    def addPoints(self, points, labels=None):
+        """Add the points at once as addPoint does one by one."""
+        coords = _to_coords(points)
+        labels = [1] * len(coords) if labels is None else list(labels)
+        if not len(coords):
+            return
+        first = self._coords[0] if len(self._coords) else coords[0]
+        is_first = np.all(coords == first, axis=1)
+        if not len(self._coords):
+            is_first[0] = False
+        if is_first.any():
+            self.close()
+            coords = coords[~is_first]
+            labels = [label for label, b in zip(labels, is_first) if not b]
+        self.coords = np.vstack([self._coords, coords])
+        self.point_labels.extend(labels)
+
     def canAddPoint(self):
         return self.shape_type in ["polygon", "linestrip"]
 
     def popPoint(self):
-        if self.points:
+        if len(self._coords):
             if self.point_labels:
                 self.point_labels.pop()
-            return self.points.pop()
+            point = self[-1]
+            self.coords = self._coords[:-1]
+            return point
         return None
 
     def insertPoint(self, i, point, label=1):
-        self.points.insert(i, point)
+        self.coords = np.insert(self._coords, i, (point.x(), point.y()), axis=0)
         self.point_labels.insert(i, label)
 
     def removePoint(self, i):
@@ -147,23 +269,23 @@ class Shape(object):
             )
             return
 
-        if self.shape_type == "polygon" and len(self.points) <= 3:
+        if self.shape_type == "polygon" and len(self) <= 3:
             logger.warning(
                 "Cannot remove point from: shape_type=%r, len(points)=%d",
                 self.shape_type,
-                len(self.points),
+                len(self),
             )
             return
 
-        if self.shape_type == "linestrip" and len(self.points) <= 2:
+        if self.shape_type == "linestrip" and len(self) <= 2:
             logger.warning(
                 "Cannot remove point from: shape_type=%r, len(points)=%d",
                 self.shape_type,
-                len(self.points),
+                len(self),
             )
             return
 
-        self.points.pop(i)
+        self.coords = np.delete(self._coords, i, axis=0)
         self.point_labels.pop(i)
 
     def isClosed(self):
@@ -171,9 +293,10 @@ class Shape(object):
 
     def setOpen(self):
         self._closed = False
+        self._clear_cache()
 
     def paint(self, painter):
-        if self.mask is None and not self.points:
+        if self.mask is None and not len(self):
             return
 
         color = self.select_line_color if self.selected else self.line_color
@@ -183,155 +306,193 @@ class Shape(object):
         painter.setPen(pen)
 
         if self.mask is not None:
-            image_to_draw = np.zeros(self.mask.shape + (4,), dtype=np.uint8)
-            fill_color = (
-                self.select_fill_color.getRgb()
-                if self.selected
-                else self.fill_color.getRgb()
-            )
-            image_to_draw[self.mask] = fill_color
-            qimage = QtGui.QImage.fromData(labelme.utils.img_arr_to_data(image_to_draw))
-            qimage = qimage.scaled(
-                qimage.size() * self.scale,
-                QtCore.Qt.IgnoreAspectRatio,
-                QtCore.Qt.SmoothTransformation,
-            )
-
-            painter.drawImage(self._scale_point(point=self.points[0]), qimage)
-
-            line_path = QtGui.QPainterPath()
-            contours = skimage.measure.find_contours(np.pad(self.mask, pad_width=1))
-            for contour in contours:
-                contour += [self.points[0].y(), self.points[0].x()]
-                line_path.moveTo(
-                    self._scale_point(QtCore.QPointF(contour[0, 1], contour[0, 0]))
-                )
-                for point in contour[1:]:
-                    line_path.lineTo(
-                        self._scale_point(QtCore.QPointF(point[1], point[0]))
-                    )
-            painter.drawPath(line_path)
+            fill_color = self.select_fill_color if self.selected else self.fill_color
+            x, y = self._coords[0]
+            painter.save()
+            painter.scale(self.scale, self.scale)
+            painter.translate(x, y)
+            painter.drawImage(QtCore.QPointF(0, 0), self._getMaskImage(fill_color))
+            pen.setCosmetic(True)
+            painter.setPen(pen)
+            painter.drawPath(self._getMaskContourPath())
+            painter.restore()
 
-        if self.points:
-            line_path = QtGui.QPainterPath()
-            vrtx_path = QtGui.QPainterPath()
-            negative_vrtx_path = QtGui.QPainterPath()
-
-            if self.shape_type in ["rectangle", "mask"]:
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
-                    rectangle = QtCore.QRectF(
-                        self._scale_point(self.points[0]),
-                        self._scale_point(self.points[1]),
-                    )
-                    line_path.addRect(rectangle)
-                if self.shape_type == "rectangle":
-                    for i in range(len(self.points)):
-                        self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "circle":
-                assert len(self.points) in [1, 2]
-                if len(self.points) == 2:
-                    raidus = labelme.utils.distance(
-                        self._scale_point(self.points[0] - self.points[1])
-                    )
-                    line_path.addEllipse(
-                        self._scale_point(self.points[0]), raidus, raidus
-                    )
-                for i in range(len(self.points)):
-                    self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "linestrip":
-                line_path.moveTo(self._scale_point(self.points[0]))
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(self._scale_point(p))
-                    self.drawVertex(vrtx_path, i)
-            elif self.shape_type == "points":
-                assert len(self.points) == len(self.point_labels)
-                for i, point_label in enumerate(self.point_labels):
-                    if point_label == 1:
-                        self.drawVertex(vrtx_path, i)
-                    else:
-                        self.drawVertex(negative_vrtx_path, i)
+        if len(self):
+            if self._isVertexVisible():
+                vrtx_path, negative_vrtx_path = self._getVertexPaths()
             else:
-                line_path.moveTo(self._scale_point(self.points[0]))
-                # Uncommenting the following line will draw 2 paths
-                # for the 1st vertex, and make it non-filled, which
-                # may be desirable.
-                # self.drawVertex(vrtx_path, 0)
-
-                for i, p in enumerate(self.points):
-                    line_path.lineTo(self._scale_point(p))
-                    self.drawVertex(vrtx_path, i)
-                if self.isClosed():
-                    line_path.lineTo(self._scale_point(self.points[0]))
-
+                vrtx_path = negative_vrtx_path = QtGui.QPainterPath()
+
+            # draw the cached path in the image coordinates with the pen
+            # width in the widget coordinates
+            line_path = self._getSimplifiedLinePath()
+            painter.save()
+            painter.scale(self.scale, self.scale)
+            pen.setCosmetic(True)
+            painter.setPen(pen)
             painter.drawPath(line_path)
+            painter.restore()
+
             if vrtx_path.length() > 0:
+                if self._highlightIndex is not None:
+                    vertex_fill_color = self.hvertex_fill_color
+                else:
+                    vertex_fill_color = self.vertex_fill_color
                 painter.drawPath(vrtx_path)
-                painter.fillPath(vrtx_path, self._vertex_fill_color)
+                painter.fillPath(vrtx_path, vertex_fill_color)
             if self.fill and self.mask is None:
                 color = self.select_fill_color if self.selected else self.fill_color
+                painter.save()
+                painter.scale(self.scale, self.scale)
                 painter.fillPath(line_path, color)
+                painter.restore()
 
             pen.setColor(QtGui.QColor(255, 0, 0, 255))
             painter.setPen(pen)
             painter.drawPath(negative_vrtx_path)
             painter.fillPath(negative_vrtx_path, QtGui.QColor(255, 0, 0, 255))
 
+    def _getLinePath(self):
+        if self._line_path is None:
+            if self.shape_type == "points":
+                path = QtGui.QPainterPath()
+            else:
+                path = QtGui.QPainterPath(self.makePath())
+            if self.shape_type in ["polygon", "line", "point"] and self.isClosed():
+                path.closeSubpath()
+            self._line_path = path
+        return self._line_path
+
+    def _getSimplifiedLinePath(self):
+        # consecutive vertices on the same pixel of the widget are merged, so
+        # polygons with many vertices are drawn fast when zoomed out
+        if self.shape_type not in ["polygon", "linestrip"]:
+            return self._getLinePath()
+        if (
+            self._simplified_line_path is None
+            or self._simplified_line_path[0] != self.scale
+        ):
+            pixels = np.floor(self._coords * self.scale)
+            keep = np.ones(len(pixels), dtype=bool)
+            keep[1:] = (pixels[1:] != pixels[:-1]).any(axis=1)
+            if keep.all():
+                path = self._getLinePath()
+            else:
+                path = QtGui.QPainterPath()
+                path.addPolygon(
+                    QtGui.QPolygonF(
+                        [QtCore.QPointF(x, y) for x, y in self._coords[keep]]
+                    )
+                )
+                if self.shape_type == "polygon" and self.isClosed():
+                    path.closeSubpath()
+            self._simplified_line_path = (self.scale, path)
+        return self._simplified_line_path[1]
+
+    def _isVertexVisible(self):
+        # vertices of shapes not being edited are not drawn when they are too
+        # close in the widget to be told apart
+        if (
+            self.selected
+            or self.fill
+            or self._highlightIndex is not None
+            or self.shape_type == "points"
+            or len(self) < 2
+        ):
+            return True
+        if self._mean_edge_length is None:
+            self._mean_edge_length = float(
+                np.linalg.norm(np.diff(self._coords, axis=0), axis=1).mean()
+            )
+        return self._mean_edge_length * self.scale >= self.point_size / 2
+
+    def _getVertexPaths(self):
+        key = (
+            self.scale,
+            self.point_size,
+            self.point_type,
+            self._highlightIndex,
+            self._highlightMode,
+        )
+        if self._vertex_paths is not None and self._vertex_paths[0] == key:
+            return self._vertex_paths[1:]
+
+        vrtx_path = QtGui.QPainterPath()
+        negative_vrtx_path = QtGui.QPainterPath()
+        if self.shape_type == "points":
+            assert len(self) == len(self.point_labels)
+            for i, point_label in enumerate(self.point_labels):
+                if point_label == 1:
+                    self.drawVertex(vrtx_path, i)
+                else:
+                    self.drawVertex(negative_vrtx_path, i)
+        elif self.shape_type != "mask":
+            for i in range(len(self)):
+                self.drawVertex(vrtx_path, i)
+        self._vertex_paths = (key, vrtx_path, negative_vrtx_path)
+        return vrtx_path, negative_vrtx_path
+
     def drawVertex(self, path, i):
         d = self.point_size
         shape = self.point_type
-        point = self._scale_point(self.points[i])
+        x, y = self._coords[i] * self.scale
         if i == self._highlightIndex:
             size, shape = self._highlightSettings[self._highlightMode]
             d *= size
-        if self._highlightIndex is not None:
-            self._vertex_fill_color = self.hvertex_fill_color
-        else:
-            self._vertex_fill_color = self.vertex_fill_color
         if shape == self.P_SQUARE:
-            path.addRect(point.x() - d / 2, point.y() - d / 2, d, d)
+            path.addRect(x - d / 2, y - d / 2, d, d)
         elif shape == self.P_ROUND:
-            path.addEllipse(point, d / 2.0, d / 2.0)
+            path.addEllipse(QtCore.QPointF(x, y), d / 2.0, d / 2.0)
         else:
             assert False, "unsupported vertex shape"
 
     def nearestVertex(self, point, epsilon):
-        min_distance = float("inf")
-        min_i = None
-        point = QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
-        for i, p in enumerate(self.points):
-            p = QtCore.QPointF(p.x() * self.scale, p.y() * self.scale)
-            dist = labelme.utils.distance(p - point)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                min_i = i
-        return min_i
+        if not len(self):
+            return None
+        distances = (
+            np.linalg.norm(self._coords - (point.x(), point.y()), axis=1) * self.scale
+        )
+        i = int(np.argmin(distances))
+        if distances[i] <= epsilon:
+            return i
+        return None
 
     def nearestEdge(self, point, epsilon):
-        min_distance = float("inf")
-        post_i = None
-        point = QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
-        for i in range(len(self.points)):
-            start = self.points[i - 1]
-            end = self.points[i]
-            start = QtCore.QPointF(start.x() * self.scale, start.y() * self.scale)
-            end = QtCore.QPointF(end.x() * self.scale, end.y() * self.scale)
-            line = [start, end]
-            dist = labelme.utils.distancetoline(point, line)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                post_i = i
-        return post_i
+        if not len(self):
+            return None
+        # the edge i is from the point i - 1 to the point i
+        starts = np.roll(self._coords, 1, axis=0)
+        directions = self._coords - starts
+        lengths2 = (directions**2).sum(axis=1)
+        # the nearest position on each edge as a ratio from its start
+        ratios = ((point.x(), point.y()) - starts) * directions
+        ratios = np.divide(
+            ratios.sum(axis=1),
+            lengths2,
+            out=np.zeros_like(lengths2),
+            where=lengths2 > 0,
+        ).clip(0, 1)
+        distances = (
+            np.linalg.norm(
+                starts + ratios[:, None] * directions - (point.x(), point.y()),
+                axis=1,
+            )
+            * self.scale
+        )
+        i = int(np.argmin(distances))
+        if distances[i] <= epsilon:
+            return i
+        return None
 
     def containsPoint(self, point):
         if self.mask is not None:
             y = np.clip(
-                int(round(point.y() - self.points[0].y())),
+                int(round(point.y() - self._coords[0, 1])),
                 0,
                 self.mask.shape[0] - 1,
             )
             x = np.clip(
-                int(round(point.x() - self.points[0].x())),
+                int(round(point.x() - self._coords[0, 0])),
                 0,
                 self.mask.shape[1] - 1,
             )
@@ -339,29 +500,37 @@ class Shape(object):
         return self.makePath().contains(point)
 
     def makePath(self):
+        if self._path is None:
+            self._path = self._makePath()
+        return self._path
+
+    def _makePath(self):
         if self.shape_type in ["rectangle", "mask"]:
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
-                path.addRect(QtCore.QRectF(self.points[0], self.points[1]))
+            if len(self) == 2:
+                path.addRect(QtCore.QRectF(self[0], self[1]))
         elif self.shape_type == "circle":
             path = QtGui.QPainterPath()
-            if len(self.points) == 2:
-                raidus = labelme.utils.distance(self.points[0] - self.points[1])
-                path.addEllipse(self.points[0], raidus, raidus)
+            if len(self) == 2:
+                raidus = labelme.utils.distance(self[0] - self[1])
+                path.addEllipse(self[0], raidus, raidus)
         else:
-            path = QtGui.QPainterPath(self.points[0])
-            for p in self.points[1:]:
-                path.lineTo(p)
+            path = QtGui.QPainterPath()
+            path.addPolygon(QtGui.QPolygonF(self.points))
         return path
 
     def boundingRect(self):
-        return self.makePath().boundingRect()
+        if self._bounding_rect is None:
+            self._bounding_rect = self.makePath().boundingRect()
+        return QtCore.QRectF(self._bounding_rect)
 
     def moveBy(self, offset):
-        self.points = [p + offset for p in self.points]
+        self.coords = self._coords + (offset.x(), offset.y())
 
     def moveVertexBy(self, i, offset):
-        self.points[i] = self.points[i] + offset
+        coords = self._coords.copy()
+        coords[i] += (offset.x(), offset.y())
+        self.coords = coords
 
     def highlightVertex(self, i, action):
         """Highlight a vertex appropriately based on the current action
@@ -379,13 +548,38 @@ class Shape(object):
         self._highlightIndex = None
 
     def copy(self):
-        return copy.deepcopy(self)
+        # coords, mask and colors are replaced instead of modified, so they
+        # are shared
+        shared = [self._coords, self.mask, self._highlightSettings] + [
+            value for value in vars(self).values() if isinstance(value, QtGui.QColor)
+        ]
+        return copy.deepcopy(self, memo={id(value): value for value in shared})
+
+    def hasSameData(self, other):
+        """Return whether the shapes have the same data saved in label files."""
+        return (
+            self._coords is other._coords
+            and self.mask is other.mask
+            and self.shape_type == other.shape_type
+            and self.label == other.label
+            and self.group_id == other.group_id
+            and self.description == other.description
+            and self.flags == other.flags
+            and self.other_data == other.other_data
+            and self.point_labels == other.point_labels
+            and self._closed == other._closed
+        )
 
     def __len__(self):
-        return len(self.points)
+        return len(self._coords)
 
     def __getitem__(self, key):
-        return self.points[key]
+        if isinstance(key, slice):
+            return self.points[key]
+        x, y = self._coords[key]
+        return QtCore.QPointF(x, y)
 
     def __setitem__(self, key, value):
-        self.points[key] = value
+        coords = self._coords.copy()
+        coords[key] = (value.x(), value.y())
+        self.coords = coords
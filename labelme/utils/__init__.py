@@ -2,7 +2,9 @@
 
 from ._io import lblsave
 
+from .image import adjust_brightness_contrast
 from .image import apply_exif_orientation
+from .image import get_exif_orientation
 from .image import img_arr_to_b64
 from .image import img_arr_to_data
 from .image import img_b64_to_arr
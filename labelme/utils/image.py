@@ -66,18 +66,55 @@ def img_qt_to_arr(img_qt):
     return img_arr
 
 
-def apply_exif_orientation(image):
+def _blend(degenerate, img, factor):
+    # same as PIL.Image.blend, which truncates the blended values
+    return np.clip(degenerate + factor * (img - degenerate), 0, 255).astype(np.uint8)
+
+
+def adjust_brightness_contrast(img_arr, brightness, contrast):
+    """Adjust brightness and then contrast as PIL.ImageEnhance does.
+
+    The adjustment is computed as a lookup table of 256 values, and the
+    alpha channel of RGBA images is kept as is.
+    """
+    values = np.arange(256, dtype=np.float32)
+    lut = _blend(0, values, np.float32(brightness))
+    if contrast != 1:
+        if img_arr.ndim == 2:
+            gray_weights = [1]
+        else:
+            gray_weights = [0.299, 0.587, 0.114]
+        # mean of the grayscale image from the histograms of the channels
+        mean = 0
+        for i, weight in enumerate(gray_weights):
+            channel = img_arr if img_arr.ndim == 2 else img_arr[:, :, i]
+            hist = np.bincount(channel.ravel(), minlength=256)
+            mean += weight * (hist * lut).sum() / max(hist.sum(), 1)
+        mean = int(mean + 0.5)
+        lut = _blend(mean, lut.astype(np.float32), np.float32(contrast))
+
+    adjusted = lut[img_arr]
+    if img_arr.ndim == 3 and img_arr.shape[2] == 4:
+        adjusted[:, :, 3] = img_arr[:, :, 3]
+    return adjusted
+
+
+def get_exif_orientation(image):
     try:
         exif = image._getexif()
     except AttributeError:
         exif = None
 
     if exif is None:
-        return image
+        return None
 
     exif = {PIL.ExifTags.TAGS[k]: v for k, v in exif.items() if k in PIL.ExifTags.TAGS}
 
-    orientation = exif.get("Orientation", None)
+    return exif.get("Orientation", None)
+
+
+def apply_exif_orientation(image):
+    orientation = get_exif_orientation(image)
 
     if orientation == 1:
         # do nothing
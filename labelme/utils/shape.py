@@ -18,40 +18,65 @@ def polygons_to_mask(img_shape, polygons, shape_type=None):
     return shape_to_mask(img_shape, points=polygons, shape_type=shape_type)
 
 
-def shape_to_mask(img_shape, points, shape_type=None, line_width=10, point_size=5):
-    mask = np.zeros(img_shape[:2], dtype=np.uint8)
-    mask = PIL.Image.fromarray(mask)
-    draw = PIL.ImageDraw.Draw(mask)
+def _draw_shape(draw, points, shape_type, line_width, point_size):
     xy = [tuple(point) for point in points]
     if shape_type == "circle":
         assert len(xy) == 2, "Shape of shape_type=circle must have 2 points"
         (cx, cy), (px, py) = xy
         d = math.sqrt((cx - px) ** 2 + (cy - py) ** 2)
         draw.ellipse([cx - d, cy - d, cx + d, cy + d], outline=1, fill=1)
+        bbox = [cx - d, cy - d, cx + d, cy + d]
     elif shape_type == "rectangle":
         assert len(xy) == 2, "Shape of shape_type=rectangle must have 2 points"
         draw.rectangle(xy, outline=1, fill=1)
+        bbox = [*xy[0], *xy[1]]
     elif shape_type == "line":
         assert len(xy) == 2, "Shape of shape_type=line must have 2 points"
         draw.line(xy=xy, fill=1, width=line_width)
+        bbox = _get_points_bbox(xy, margin=line_width)
     elif shape_type == "linestrip":
         draw.line(xy=xy, fill=1, width=line_width)
+        bbox = _get_points_bbox(xy, margin=line_width)
     elif shape_type == "point":
         assert len(xy) == 1, "Shape of shape_type=point must have 1 points"
         cx, cy = xy[0]
         r = point_size
         draw.ellipse([cx - r, cy - r, cx + r, cy + r], outline=1, fill=1)
+        bbox = [cx - r, cy - r, cx + r, cy + r]
     else:
         assert len(xy) > 2, "Polygon must have points more than 2"
         draw.polygon(xy=xy, outline=1, fill=1)
+        bbox = _get_points_bbox(xy, margin=0)
+    return bbox
+
+
+def _get_points_bbox(xy, margin):
+    xs, ys = zip(*xy)
+    return [min(xs) - margin, min(ys) - margin, max(xs) + margin, max(ys) + margin]
+
+
+def shape_to_mask(img_shape, points, shape_type=None, line_width=10, point_size=5):
+    mask = np.zeros(img_shape[:2], dtype=np.uint8)
+    mask = PIL.Image.fromarray(mask)
+    draw = PIL.ImageDraw.Draw(mask)
+    _draw_shape(draw, points, shape_type, line_width=line_width, point_size=point_size)
     mask = np.array(mask, dtype=bool)
     return mask
 
 
 def shapes_to_label(img_shape, shapes, label_name_to_value):
-    cls = np.zeros(img_shape[:2], dtype=np.int32)
+    height, width = img_shape[:2]
+    cls = np.zeros((height, width), dtype=np.int32)
     ins = np.zeros_like(cls)
-    instances = []
+
+    # Shapes are drawn one by one on a single canvas, and only the pixels
+    # inside the bounding box of each shape are read and cleared. This keeps
+    # the rasterization identical to shape_to_mask, while the cost of each
+    # shape is proportional to its size rather than to the image size.
+    canvas = PIL.Image.new("L", (width, height))
+    draw = PIL.ImageDraw.Draw(canvas)
+
+    instances = {}
     for shape in shapes:
         points = shape["points"]
         label = shape["label"]
@@ -64,13 +89,25 @@ def shapes_to_label(img_shape, shapes, label_name_to_value):
         instance = (cls_name, group_id)
 
         if instance not in instances:
-            instances.append(instance)
-        ins_id = instances.index(instance) + 1
+            instances[instance] = len(instances) + 1
+        ins_id = instances[instance]
         cls_id = label_name_to_value[cls_name]
 
-        mask = shape_to_mask(img_shape[:2], points, shape_type)
-        cls[mask] = cls_id
-        ins[mask] = ins_id
+        x1, y1, x2, y2 = _draw_shape(
+            draw, points, shape_type, line_width=10, point_size=5
+        )
+        # margin for the rounding of the outline in PIL.ImageDraw
+        x1 = min(max(math.floor(x1) - 2, 0), width)
+        y1 = min(max(math.floor(y1) - 2, 0), height)
+        x2 = min(max(math.ceil(x2) + 3, 0), width)
+        y2 = min(max(math.ceil(y2) + 3, 0), height)
+        if x1 >= x2 or y1 >= y2:
+            continue
+
+        mask = np.array(canvas.crop((x1, y1, x2, y2)), dtype=bool)
+        cls[y1:y2, x1:x2][mask] = cls_id
+        ins[y1:y2, x1:x2][mask] = ins_id
+        draw.rectangle((x1, y1, x2 - 1, y2 - 1), fill=0)
 
     return cls, ins
 
@@ -10,6 +10,11 @@ from .color_dialog import ColorDialog
 
 from .file_dialog_preview import FileDialogPreview
 
+from .file_list_widget import FileListWidget
+from .file_list_widget import ImageFileScanner
+
+from .image_pyramid import ImagePyramid
+
 from .label_dialog import LabelDialog
 from .label_dialog import LabelQLineEdit
 
@@ -1,9 +1,9 @@
-import PIL.Image
-import PIL.ImageEnhance
 from qtpy import QtWidgets
 from qtpy.QtCore import Qt
 from qtpy.QtGui import QImage
 
+import labelme.utils
+
 
 class BrightnessContrastDialog(QtWidgets.QDialog):
     _base_value = 50
@@ -47,21 +47,39 @@ class BrightnessContrastDialog(QtWidgets.QDialog):
         del layouts
         self.setLayout(layout)
 
-        assert isinstance(img, PIL.Image.Image)
+        assert isinstance(img, QImage)
         self.img = img
         self.callback = callback
 
     def onNewValue(self, _):
-        brightness = self.slider_brightness.value() / self._base_value
-        contrast = self.slider_contrast.value() / self._base_value
+        self.callback(
+            self.adjustImage(
+                self.img,
+                brightness=self.slider_brightness.value(),
+                contrast=self.slider_contrast.value(),
+            )
+        )
 
-        img = self.img
-        if brightness != 1:
-            img = PIL.ImageEnhance.Brightness(img).enhance(brightness)
-        if contrast != 1:
-            img = PIL.ImageEnhance.Contrast(img).enhance(contrast)
+    @classmethod
+    def adjustImage(cls, img, brightness=None, contrast=None):
+        """Return the image adjusted by the slider values, or itself if not."""
+        brightness = 1 if brightness is None else brightness / cls._base_value
+        contrast = 1 if contrast is None else contrast / cls._base_value
+        if brightness == 1 and contrast == 1:
+            return img
 
-        qimage = QImage(
-            img.tobytes(), img.width, img.height, img.width * 3, QImage.Format_RGB888
+        if not isinstance(img, QImage):
+            # e.g., ImagePyramid, decoded only when adjusted
+            img = img.toImage()
+        img = img.convertToFormat(QImage.Format_RGBA8888)
+        img_arr = labelme.utils.img_qt_to_arr(img)
+        img_arr = labelme.utils.adjust_brightness_contrast(
+            img_arr, brightness=brightness, contrast=contrast
         )
-        self.callback(qimage)
+        return QImage(
+            img_arr.data,
+            img_arr.shape[1],
+            img_arr.shape[0],
+            img_arr.shape[1] * 4,
+            QImage.Format_RGBA8888,
+        ).copy()
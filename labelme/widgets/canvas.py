@@ -1,4 +1,11 @@
+import collections
+import functools
+import math
+import threading
+import time
+
 import imgviz
+import numpy as np
 from qtpy import QtCore
 from qtpy import QtGui
 from qtpy import QtWidgets
@@ -8,6 +15,7 @@ import labelme.utils
 from labelme import QT5
 from labelme.logger import logger
 from labelme.shape import Shape
+from labelme.widgets.image_pyramid import ImagePyramid
 
 # TODO(unknown):
 # - [maybe] Find optimal epsilon value.
@@ -22,6 +30,200 @@ CURSOR_GRAB = QtCore.Qt.OpenHandCursor
 MOVE_SPEED = 5.0
 
 
+def _qimage_to_ai_image(qimage):
+    # use a fixed format so that the canvas pixmap and the prefetched images
+    # give the same array, which is the key of the embedding cache
+    return labelme.utils.img_qt_to_arr(
+        qimage.convertToFormat(QtGui.QImage.Format_RGB32)
+    )
+
+
+def _load_ai_image(qimage_loader):
+    qimage = qimage_loader()
+    if qimage is None or qimage.isNull():
+        return None
+    return _qimage_to_ai_image(qimage)
+
+
+def _predict_ai_preview(ai_model, request):
+    create_mode, points, point_labels = request
+    if create_mode == "ai_polygon":
+        polygon = ai_model.predict_polygon_from_points(
+            points=[list(point) for point in points],
+            point_labels=list(point_labels),
+        )
+        return request, polygon, None
+    mask = ai_model.predict_mask_from_points(
+        points=[list(point) for point in points],
+        point_labels=list(point_labels),
+    )
+    if not mask.any():
+        # nothing to preview, e.g., a point on the background
+        return None
+    y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
+    return request, np.array([[x1, y1], [x2, y2]]), mask[y1 : y2 + 1, x1 : x2 + 1]
+
+
+class _AiPreviewWorker(QtCore.QObject):
+    """Runs AI preview predictions in a background thread.
+
+    Only the latest request is kept, so the requests made while a prediction
+    is running are coalesced into one.
+    """
+
+    finished = QtCore.Signal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._request = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, predict_fn):
+        with self._condition:
+            self._request = predict_fn
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._request is None:
+                    self._condition.wait()
+                predict_fn = self._request
+                self._request = None
+
+            try:
+                result = predict_fn()
+            except Exception:
+                logger.exception("Failed to predict AI preview")
+                continue
+            self.finished.emit(result)
+
+
+class _ShapeIndex(object):
+    """Grid over the bounding boxes of shapes to find the shapes in a region.
+
+    Canvas tells the index about the shapes it adds, removes and edits, and
+    the edited shapes are put in their new cells on the next lookup.
+    """
+
+    MAX_CELLS_PER_SHAPE = 64
+
+    def __init__(self, shapes):
+        shapes = list(shapes)
+        bboxes = [self._getBoundingBox(shape) for shape in shapes]
+        sizes = [max(x2 - x1, y2 - y1) for x1, y1, x2, y2 in bboxes]
+        self._cell_size = max(2 * float(np.median(sizes)), 16.0) if sizes else 16.0
+
+        self._cells = collections.defaultdict(set)
+        # the cells of each shape, or None if too large for the grid
+        self._shape_cells = {}
+        # shapes too large for the grid, which are always candidates
+        self._large = set()
+        # z-order of the shapes, as shapes are only added at the top
+        self._order = {}
+        self._next_order = 0
+        self._dirty = set()
+        for shape, bbox in zip(shapes, bboxes):
+            self._order[shape] = self._next_order
+            self._next_order += 1
+            self._addCells(shape, bbox)
+
+    @staticmethod
+    def _getBoundingBox(shape):
+        if not len(shape):
+            return 0, 0, 0, 0
+        if len(shape) == 1:
+            x1, y1 = x2, y2 = shape.coords[0]
+        else:
+            rect = shape.boundingRect()
+            x1, y1, x2, y2 = rect.left(), rect.top(), rect.right(), rect.bottom()
+        if shape.mask is not None:
+            x2 = max(x2, shape.coords[0, 0] + shape.mask.shape[1])
+            y2 = max(y2, shape.coords[0, 1] + shape.mask.shape[0])
+        return x1, y1, x2, y2
+
+    def _getCellRange(self, x1, y1, x2, y2):
+        return (
+            math.floor(x1 / self._cell_size),
+            math.floor(y1 / self._cell_size),
+            math.floor(x2 / self._cell_size),
+            math.floor(y2 / self._cell_size),
+        )
+
+    def add(self, shape):
+        self._order[shape] = self._next_order
+        self._next_order += 1
+        self._dirty.add(shape)
+
+    def remove(self, shape):
+        if shape not in self._order:
+            return
+        self._removeCells(shape)
+        del self._order[shape]
+        self._dirty.discard(shape)
+
+    def update(self, shape):
+        # edits of shapes not in the index (e.g., copies being moved) are
+        # ignored
+        if shape in self._order:
+            self._dirty.add(shape)
+
+    def _removeCells(self, shape):
+        cells = self._shape_cells.pop(shape, None)
+        if cells is None:
+            self._large.discard(shape)
+            return
+        for cell in cells:
+            self._cells[cell].discard(shape)
+            if not self._cells[cell]:
+                del self._cells[cell]
+
+    def _addCells(self, shape, bbox):
+        i1, j1, i2, j2 = self._getCellRange(*bbox)
+        if (i2 - i1 + 1) * (j2 - j1 + 1) > self.MAX_CELLS_PER_SHAPE:
+            self._large.add(shape)
+            self._shape_cells[shape] = None
+            return
+        cells = [(i, j) for i in range(i1, i2 + 1) for j in range(j1, j2 + 1)]
+        for cell in cells:
+            self._cells[cell].add(shape)
+        self._shape_cells[shape] = cells
+
+    def _flush(self):
+        for shape in self._dirty:
+            if shape in self._shape_cells:
+                self._removeCells(shape)
+            self._addCells(shape, self._getBoundingBox(shape))
+        self._dirty.clear()
+
+    def shapesNear(self, point, distance):
+        """Return the shapes within the distance, from the top to the bottom."""
+        return self.shapesIn(
+            point.x() - distance,
+            point.y() - distance,
+            point.x() + distance,
+            point.y() + distance,
+        )[::-1]
+
+    def shapesIn(self, x1, y1, x2, y2):
+        """Return the shapes in the box, from the bottom to the top."""
+        self._flush()
+        i1, j1, i2, j2 = self._getCellRange(x1, y1, x2, y2)
+        shapes = set(self._large)
+        if (i2 - i1 + 1) * (j2 - j1 + 1) > len(self._cells):
+            for shapes_in_cell in self._cells.values():
+                shapes.update(shapes_in_cell)
+        else:
+            for i in range(i1, i2 + 1):
+                for j in range(j1, j2 + 1):
+                    shapes.update(self._cells.get((i, j), ()))
+        return sorted(shapes, key=self._order.__getitem__)
+
+
 class Canvas(QtWidgets.QWidget):
     zoomRequest = QtCore.Signal(int, QtCore.QPoint)
     scrollRequest = QtCore.Signal(int, int)
@@ -47,6 +249,9 @@ class Canvas(QtWidgets.QWidget):
                 "Unexpected value for double_click event: {}".format(self.double_click)
             )
         self.num_backups = kwargs.pop("num_backups", 10)
+        self._ai_embedding_cache_config = kwargs.pop(
+            "ai_embedding_cache", {"dir": None, "max_size_mb": 0}
+        )
         self._crosshair = kwargs.pop(
             "crosshair",
             {
@@ -60,11 +265,15 @@ class Canvas(QtWidgets.QWidget):
                 "ai_mask": False,
             },
         )
+        self._tiled_image = kwargs.pop(
+            "tiled_image", {"min_size": 4096, "max_size_mb": 256}
+        )
         super(Canvas, self).__init__(*args, **kwargs)
         # Initialise local state.
         self.mode = self.EDIT
         self.shapes = []
         self.shapesBackups = []
+        self._shapeSnapshots = {}
         self.current = None
         self.selectedShapes = []  # save the selected shapes here
         self.selectedShapesCopy = []
@@ -101,7 +310,23 @@ class Canvas(QtWidgets.QWidget):
         self.setMouseTracking(True)
         self.setFocusPolicy(QtCore.Qt.WheelFocus)
 
+        self._shapeIndex = _ShapeIndex([])
+
+        # repaints requested by mouse moves are merged into one per frame
+        self._dirtyRegion = QtGui.QRegion()
+        self._dirtyAll = False
+        self._lastPaintTime = 0.0
+        self._updateTimer = QtCore.QTimer(self)
+        self._updateTimer.setSingleShot(True)
+        self._updateTimer.timeout.connect(self._onUpdateTimeout)
+
         self._ai_model = None
+        self._ai_embedding_cache = None
+        self._ai_prefetch_image_loaders = []
+        self._ai_preview = None
+        self._ai_preview_request = None
+        self._ai_preview_worker = _AiPreviewWorker(self)
+        self._ai_preview_worker.finished.connect(self._onAiPreviewFinished)
 
     def fillDrawing(self):
         return self._fill_drawing
@@ -137,20 +362,48 @@ class Canvas(QtWidgets.QWidget):
             logger.debug("AI model is already initialized: %r" % model.name)
         else:
             logger.debug("Initializing AI model: %r" % model.name)
-            self._ai_model = model()
+            self._ai_model = model(embedding_cache=self._getAiEmbeddingCache())
 
         if self.pixmap is None:
             logger.warning("Pixmap is not set yet")
             return
 
-        self._ai_model.set_image(
-            image=labelme.utils.img_qt_to_arr(self.pixmap.toImage())
-        )
+        self._ai_model.set_image(image=_qimage_to_ai_image(self.pixmap.toImage()))
+        self._ai_model.prefetch_images(self._ai_prefetch_image_loaders)
+
+    def prefetchAiImages(self, qimage_loaders):
+        self._ai_prefetch_image_loaders = [
+            functools.partial(_load_ai_image, qimage_loader)
+            for qimage_loader in qimage_loaders
+        ]
+        if self._ai_model is not None:
+            self._ai_model.prefetch_images(self._ai_prefetch_image_loaders)
+
+    def _getAiEmbeddingCache(self):
+        if self._ai_embedding_cache is None:
+            config = self._ai_embedding_cache_config
+            if not config["max_size_mb"]:
+                return None
+            try:
+                self._ai_embedding_cache = labelme.ai.DiskEmbeddingCache(
+                    cache_dir=config["dir"], max_size_mb=config["max_size_mb"]
+                )
+            except OSError as e:
+                logger.warning("Failed to create embedding cache: %s" % e)
+                return None
+        return self._ai_embedding_cache
 
     def storeShapes(self):
+        # unchanged shapes share the snapshot with the previous backup
+        shapeSnapshots = {}
         shapesBackup = []
         for shape in self.shapes:
-            shapesBackup.append(shape.copy())
+            snapshot = self._shapeSnapshots.get(shape)
+            if snapshot is None or not shape.hasSameData(snapshot):
+                snapshot = shape.copy()
+            shapeSnapshots[shape] = snapshot
+            shapesBackup.append(snapshot)
+        self._shapeSnapshots = shapeSnapshots
         if len(self.shapesBackups) > self.num_backups:
             self.shapesBackups = self.shapesBackups[-self.num_backups - 1 :]
         self.shapesBackups.append(shapesBackup)
@@ -175,7 +428,10 @@ class Canvas(QtWidgets.QWidget):
         # The application will eventually call Canvas.loadShapes which will
         # push this right back onto the stack.
         shapesBackup = self.shapesBackups.pop()
-        self.shapes = shapesBackup
+        # copied so that the snapshots in the backups are never edited
+        self.shapes = [snapshot.copy() for snapshot in shapesBackup]
+        self._shapeIndex = _ShapeIndex(self.shapes)
+        self._shapeSnapshots = dict(zip(self.shapes, shapesBackup))
         self.selectedShapes = []
         for shape in self.shapes:
             shape.selected = False
@@ -194,6 +450,14 @@ class Canvas(QtWidgets.QWidget):
     def isVisible(self, shape):
         return self.visible.get(shape, True)
 
+    def shapesNear(self, point, distance=0):
+        """Return the visible shapes near the point, from the top to the bottom."""
+        return [
+            shape
+            for shape in self._shapeIndex.shapesNear(point, distance)
+            if self.isVisible(shape)
+        ]
+
     def drawing(self):
         return self.mode == self.CREATE
 
@@ -237,6 +501,7 @@ class Canvas(QtWidgets.QWidget):
 
         self.mouseMoved.emit(pos)
 
+        prevMovePoint = self.prevMovePoint
         self.prevMovePoint = pos
         self.restoreCursor()
 
@@ -251,9 +516,18 @@ class Canvas(QtWidgets.QWidget):
 
             self.overrideCursor(CURSOR_DRAW)
             if not self.current:
-                self.repaint()  # draw crosshair
+                self._scheduleUpdate(self._getCrosshairRegion(prevMovePoint))
+                self._scheduleUpdate(self._getCrosshairRegion(pos))
                 return
 
+            if self.createMode in ["ai_polygon", "ai_mask"]:
+                # the preview can be anywhere in the image
+                self._scheduleUpdate()
+            else:
+                self._scheduleUpdate(self._getCrosshairRegion(prevMovePoint))
+                self._scheduleUpdate(self._getShapesRect([self.current, self.line]))
+            self.current.highlightClear()
+
             if self.outOfPixmap(pos):
                 # Don't allow the user to draw outside the pixmap.
                 # Project the point to the pixmap's edges.
@@ -278,6 +552,12 @@ class Canvas(QtWidgets.QWidget):
                     self.current.point_labels[-1],
                     0 if is_shift_pressed else 1,
                 ]
+                # requested as the prompt changes, and painted when finished
+                self._requestAiPreview(
+                    points=self.current.points + [pos],
+                    point_labels=self.current.point_labels
+                    + [self.line.point_labels[1]],
+                )
             elif self.createMode == "rectangle":
                 self.line.points = [self.current[0], pos]
                 self.line.point_labels = [1, 1]
@@ -295,31 +575,34 @@ class Canvas(QtWidgets.QWidget):
                 self.line.point_labels = [1]
                 self.line.close()
             assert len(self.line.points) == len(self.line.point_labels)
-            self.repaint()
-            self.current.highlightClear()
+            self._scheduleUpdate(self._getCrosshairRegion(self.prevMovePoint))
+            self._scheduleUpdate(self._getShapesRect([self.current, self.line]))
             return
 
         # Polygon copy moving.
         if QtCore.Qt.RightButton & ev.buttons():
             if self.selectedShapesCopy and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
+                self._scheduleUpdate(self._getShapesRect(self.selectedShapesCopy))
                 self.boundedMoveShapes(self.selectedShapesCopy, pos)
-                self.repaint()
+                self._scheduleUpdate(self._getShapesRect(self.selectedShapesCopy))
             elif self.selectedShapes:
                 self.selectedShapesCopy = [s.copy() for s in self.selectedShapes]
-                self.repaint()
+                self._scheduleUpdate(self._getShapesRect(self.selectedShapesCopy))
             return
 
         # Polygon/Vertex moving.
         if QtCore.Qt.LeftButton & ev.buttons():
             if self.selectedVertex():
+                self._scheduleUpdate(self._getShapesRect([self.hShape]))
                 self.boundedMoveVertex(pos)
-                self.repaint()
+                self._scheduleUpdate(self._getShapesRect([self.hShape]))
                 self.movingShape = True
             elif self.selectedShapes and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
+                self._scheduleUpdate(self._getShapesRect(self.selectedShapes))
                 self.boundedMoveShapes(self.selectedShapes, pos)
-                self.repaint()
+                self._scheduleUpdate(self._getShapesRect(self.selectedShapes))
                 self.movingShape = True
             return
 
@@ -328,7 +611,8 @@ class Canvas(QtWidgets.QWidget):
         # - Highlight vertex
         # Update shape/vertex fill and tooltip value accordingly.
         self.setToolTip(self.tr("Image"))
-        for shape in reversed([s for s in self.shapes if self.isVisible(s)]):
+        hShape = self.hShape
+        for shape in self.shapesNear(pos, self.epsilon / self.scale):
             # Look for a nearby vertex to highlight. If that fails,
             # check if we happen to be inside a shape.
             index = shape.nearestVertex(pos, self.epsilon)
@@ -344,7 +628,7 @@ class Canvas(QtWidgets.QWidget):
                 self.overrideCursor(CURSOR_POINT)
                 self.setToolTip(self.tr("Click & drag to move point"))
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self._scheduleUpdate(self._getShapesRect([hShape, shape]))
                 break
             elif index_edge is not None and shape.canAddPoint():
                 if self.selectedVertex():
@@ -356,7 +640,7 @@ class Canvas(QtWidgets.QWidget):
                 self.overrideCursor(CURSOR_POINT)
                 self.setToolTip(self.tr("Click to create point"))
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self._scheduleUpdate(self._getShapesRect([hShape, shape]))
                 break
             elif shape.containsPoint(pos):
                 if self.selectedVertex():
@@ -371,12 +655,74 @@ class Canvas(QtWidgets.QWidget):
                 )
                 self.setStatusTip(self.toolTip())
                 self.overrideCursor(CURSOR_GRAB)
-                self.update()
+                self._scheduleUpdate(self._getShapesRect([hShape, shape]))
                 break
         else:  # Nothing found, clear highlights, reset state.
             self.unHighlight()
         self.vertexSelected.emit(self.hVertex is not None)
 
+    def _getPaintMargin(self):
+        # the highlighted vertices and the pens are drawn in the widget
+        # coordinates out of the bounding boxes of the shapes
+        return 2 * Shape.point_size + Shape.PEN_WIDTH
+
+    def _getShapesRect(self, shapes):
+        """Return the rect to repaint the shapes in the widget coordinates."""
+        bboxes = [
+            _ShapeIndex._getBoundingBox(shape)
+            for shape in shapes
+            if shape is not None and len(shape)
+        ]
+        if not bboxes:
+            return QtCore.QRect()
+        bboxes = np.array(bboxes)
+        x1, y1 = bboxes[:, :2].min(axis=0)
+        x2, y2 = bboxes[:, 2:].max(axis=0)
+        offset = self.offsetToCenter()
+        margin = self._getPaintMargin()
+        return QtCore.QRectF(
+            QtCore.QPointF(
+                (x1 + offset.x()) * self.scale - margin,
+                (y1 + offset.y()) * self.scale - margin,
+            ),
+            QtCore.QPointF(
+                (x2 + offset.x()) * self.scale + margin,
+                (y2 + offset.y()) * self.scale + margin,
+            ),
+        ).toAlignedRect()
+
+    def _getCrosshairRegion(self, point):
+        if not self._crosshair[self._createMode] or not point:
+            return QtGui.QRegion()
+        offset = self.offsetToCenter()
+        x = int((point.x() + offset.x()) * self.scale)
+        y = int((point.y() + offset.y()) * self.scale)
+        return QtGui.QRegion(0, y - 2, self.width(), 5) + QtGui.QRegion(
+            x - 2, 0, 5, self.height()
+        )
+
+    def _scheduleUpdate(self, region=None):
+        """Update the region, or the whole widget, at most once per frame."""
+        if region is None:
+            self._dirtyAll = True
+        else:
+            self._dirtyRegion += region
+        if self._updateTimer.isActive():
+            return
+        screen = QtWidgets.QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        frame_interval = 1 / (refresh_rate if refresh_rate > 0 else 60)
+        elapsed = time.monotonic() - self._lastPaintTime
+        self._updateTimer.start(int(max(0, frame_interval - elapsed) * 1000))
+
+    def _onUpdateTimeout(self):
+        if self._dirtyAll:
+            self.update()
+        elif not self._dirtyRegion.isEmpty():
+            self.update(self._dirtyRegion)
+        self._dirtyRegion = QtGui.QRegion()
+        self._dirtyAll = False
+
     def addPointToEdge(self):
         shape = self.prevhShape
         index = self.prevhEdge
@@ -384,6 +730,7 @@ class Canvas(QtWidgets.QWidget):
         if shape is None or index is None or point is None:
             return
         shape.insertPoint(index, point)
+        self._shapeIndex.update(shape)
         shape.highlightVertex(index, shape.MOVE_VERTEX)
         self.hShape = shape
         self.hVertex = index
@@ -396,6 +743,7 @@ class Canvas(QtWidgets.QWidget):
         if shape is None or index is None:
             return
         shape.removePoint(index)
+        self._shapeIndex.update(shape)
         shape.highlightClear()
         self.hShape = shape
         self.prevhVertex = None
@@ -432,7 +780,7 @@ class Canvas(QtWidgets.QWidget):
                             self.line.points[1],
                             label=self.line.point_labels[1],
                         )
-                        self.line.points[0] = self.current.points[-1]
+                        self.line[0] = self.current.points[-1]
                         self.line.point_labels[0] = self.current.point_labels[-1]
                         if ev.modifiers() & QtCore.Qt.ControlModifier:
                             self.finalise()
@@ -509,7 +857,9 @@ class Canvas(QtWidgets.QWidget):
 
         if self.movingShape and self.hShape:
             index = self.shapes.index(self.hShape)
-            if self.shapesBackups[-1][index].points != self.shapes[index].points:
+            if not np.array_equal(
+                self.shapesBackups[-1][index].coords, self.shapes[index].coords
+            ):
                 self.storeShapes()
                 self.shapeMoved.emit()
 
@@ -521,11 +871,13 @@ class Canvas(QtWidgets.QWidget):
         if copy:
             for i, shape in enumerate(self.selectedShapesCopy):
                 self.shapes.append(shape)
+                self._shapeIndex.add(shape)
                 self.selectedShapes[i].selected = False
                 self.selectedShapes[i] = shape
         else:
             for i, shape in enumerate(self.selectedShapesCopy):
                 self.selectedShapes[i].points = shape.points
+                self._shapeIndex.update(self.selectedShapes[i])
         self.selectedShapesCopy = []
         self.repaint()
         self.storeShapes()
@@ -568,8 +920,8 @@ class Canvas(QtWidgets.QWidget):
             index, shape = self.hVertex, self.hShape
             shape.highlightVertex(index, shape.MOVE_VERTEX)
         else:
-            for shape in reversed(self.shapes):
-                if self.isVisible(shape) and shape.containsPoint(point):
+            for shape in self.shapesNear(point):
+                if shape.containsPoint(point):
                     self.setHiding()
                     if shape not in self.selectedShapes:
                         if multiple_selection_mode:
@@ -611,6 +963,7 @@ class Canvas(QtWidgets.QWidget):
         if self.outOfPixmap(pos):
             pos = self.intersectionPoint(point, pos)
         shape.moveVertexBy(index, pos - point)
+        self._shapeIndex.update(shape)
 
     def boundedMoveShapes(self, shapes, pos):
         if self.outOfPixmap(pos):
@@ -633,6 +986,7 @@ class Canvas(QtWidgets.QWidget):
         if dp:
             for shape in shapes:
                 shape.moveBy(dp)
+                self._shapeIndex.update(shape)
             self.prevPoint = pos
             return True
         return False
@@ -647,9 +1001,13 @@ class Canvas(QtWidgets.QWidget):
     def deleteSelected(self):
         deleted_shapes = []
         if self.selectedShapes:
-            for shape in self.selectedShapes:
-                self.shapes.remove(shape)
-                deleted_shapes.append(shape)
+            deleted = set(self.selectedShapes)
+            self.shapes = [shape for shape in self.shapes if shape not in deleted]
+            for shape in deleted:
+                self._shapeIndex.remove(shape)
+            deleted_shapes.extend(self.selectedShapes)
+            if self.hShape in deleted:
+                self.hShape = self.hVertex = self.hEdge = None
             self.storeShapes()
             self.selectedShapes = []
             self.update()
@@ -660,6 +1018,9 @@ class Canvas(QtWidgets.QWidget):
             self.selectedShapes.remove(shape)
         if shape in self.shapes:
             self.shapes.remove(shape)
+            self._shapeIndex.remove(shape)
+        if shape is self.hShape:
+            self.hShape = self.hVertex = self.hEdge = None
         self.storeShapes()
         self.update()
 
@@ -684,6 +1045,8 @@ class Canvas(QtWidgets.QWidget):
         if not self.pixmap:
             return super(Canvas, self).paintEvent(event)
 
+        self._lastPaintTime = time.monotonic()
+
         p = self._painter
         p.begin(self)
         p.setRenderHint(QtGui.QPainter.Antialiasing)
@@ -693,7 +1056,13 @@ class Canvas(QtWidgets.QWidget):
         p.scale(self.scale, self.scale)
         p.translate(self.offsetToCenter())
 
-        p.drawPixmap(0, 0, self.pixmap)
+        # the region to paint in the image coordinates
+        rect = p.transform().inverted()[0].mapRect(QtCore.QRectF(event.rect()))
+
+        if isinstance(self.pixmap, ImagePyramid):
+            self.pixmap.paint(p, rect=rect, scale=self.scale)
+        else:
+            p.drawPixmap(0, 0, self.pixmap)
 
         p.scale(1 / self.scale, 1 / self.scale)
 
@@ -719,7 +1088,13 @@ class Canvas(QtWidgets.QWidget):
             )
 
         Shape.scale = self.scale
-        for shape in self.shapes:
+        # shapes out of the region are culled, with the margin for the
+        # highlighted vertices drawn in the widget coordinates
+        margin = self._getPaintMargin() / self.scale
+        rect.adjust(-margin, -margin, margin, margin)
+        for shape in self._shapeIndex.shapesIn(
+            rect.left(), rect.top(), rect.right(), rect.bottom()
+        ):
             if (shape.selected or not self._hideBackround) and self.isVisible(shape):
                 shape.fill = shape.selected or shape == self.hShape
                 shape.paint(p)
@@ -747,46 +1122,62 @@ class Canvas(QtWidgets.QWidget):
             drawing_shape.addPoint(self.line[1])
             drawing_shape.fill = True
             drawing_shape.paint(p)
-        elif self.createMode == "ai_polygon" and self.current is not None:
-            drawing_shape = self.current.copy()
-            drawing_shape.addPoint(
-                point=self.line.points[1],
-                label=self.line.point_labels[1],
-            )
-            points = self._ai_model.predict_polygon_from_points(
-                points=[[point.x(), point.y()] for point in drawing_shape.points],
-                point_labels=drawing_shape.point_labels,
-            )
-            if len(points) > 2:
-                drawing_shape.setShapeRefined(
-                    shape_type="polygon",
-                    points=[QtCore.QPointF(point[0], point[1]) for point in points],
-                    point_labels=[1] * len(points),
-                )
-                drawing_shape.fill = self.fillDrawing()
-                drawing_shape.selected = True
-                drawing_shape.paint(p)
-        elif self.createMode == "ai_mask" and self.current is not None:
+        elif self.createMode in ["ai_polygon", "ai_mask"] and self.current is not None:
             drawing_shape = self.current.copy()
             drawing_shape.addPoint(
                 point=self.line.points[1],
                 label=self.line.point_labels[1],
             )
-            mask = self._ai_model.predict_mask_from_points(
-                points=[[point.x(), point.y()] for point in drawing_shape.points],
-                point_labels=drawing_shape.point_labels,
+            self._paintAiPreview(p, drawing_shape)
+
+        p.end()
+
+    def _requestAiPreview(self, points, point_labels):
+        request = (
+            self.createMode,
+            tuple((point.x(), point.y()) for point in points),
+            tuple(point_labels),
+        )
+        if request == self._ai_preview_request:
+            return
+        self._ai_preview_request = request
+        self._ai_preview_worker.submit(
+            functools.partial(_predict_ai_preview, self._ai_model, request)
+        )
+
+    def _onAiPreviewFinished(self, preview):
+        self._ai_preview = preview
+        self.update()
+
+    def _paintAiPreview(self, painter, drawing_shape):
+        # paint the latest finished preview, which may be for a previous
+        # position of the cursor
+        if self._ai_preview is None:
+            return
+        (create_mode, points, _), preview_points, preview_mask = self._ai_preview
+        if create_mode != self.createMode or list(points[:-1]) != [
+            (point.x(), point.y()) for point in self.current.points
+        ]:
+            return
+
+        if create_mode == "ai_polygon":
+            if len(preview_points) <= 2:
+                return
+            drawing_shape.setShapeRefined(
+                shape_type="polygon",
+                points=preview_points,
+                point_labels=[1] * len(preview_points),
             )
-            y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
+            drawing_shape.fill = self.fillDrawing()
+        else:
             drawing_shape.setShapeRefined(
                 shape_type="mask",
-                points=[QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)],
+                points=preview_points,
                 point_labels=[1, 1],
-                mask=mask[y1 : y2 + 1, x1 : x2 + 1],
+                mask=preview_mask,
             )
-            drawing_shape.selected = True
-            drawing_shape.paint(p)
-
-        p.end()
+        drawing_shape.selected = True
+        drawing_shape.paint(painter)
 
     def transformPos(self, point):
         """Convert from widget-logical coordinates to painter-logical ones."""
@@ -805,17 +1196,46 @@ class Canvas(QtWidgets.QWidget):
         w, h = self.pixmap.width(), self.pixmap.height()
         return not (0 <= p.x() <= w - 1 and 0 <= p.y() <= h - 1)
 
+    def refineRectanglesByAiModel(self, shapes):
+        """Convert rectangles to polygons or masks in the AI create mode."""
+        if self.createMode not in ["ai_polygon", "ai_mask"] or not shapes:
+            return
+        masks = self._ai_model.predict_masks_from_prompts(
+            [dict(box=shape.coords[:2].ravel().tolist()) for shape in shapes]
+        )
+        for shape, mask in zip(shapes, masks):
+            if self.createMode == "ai_polygon":
+                points = labelme.ai.compute_polygon_from_mask(mask=mask)
+                if len(points) <= 2:
+                    continue
+                shape.setShapeRefined(
+                    shape_type="polygon",
+                    points=points,
+                    point_labels=[1] * len(points),
+                )
+            else:
+                if not mask.any():
+                    continue
+                y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
+                shape.setShapeRefined(
+                    shape_type="mask",
+                    points=[QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)],
+                    point_labels=[1, 1],
+                    mask=mask[y1 : y2 + 1, x1 : x2 + 1],
+                )
+            self._shapeIndex.update(shape)
+
     def finalise(self):
         assert self.current
         if self.createMode == "ai_polygon":
             # convert points to polygon by an AI model
             assert self.current.shape_type == "points"
             points = self._ai_model.predict_polygon_from_points(
-                points=[[point.x(), point.y()] for point in self.current.points],
+                points=self.current.coords.tolist(),
                 point_labels=self.current.point_labels,
             )
             self.current.setShapeRefined(
-                points=[QtCore.QPointF(point[0], point[1]) for point in points],
+                points=points,
                 point_labels=[1] * len(points),
                 shape_type="polygon",
             )
@@ -823,7 +1243,7 @@ class Canvas(QtWidgets.QWidget):
             # convert points to mask by an AI model
             assert self.current.shape_type == "points"
             mask = self._ai_model.predict_mask_from_points(
-                points=[[point.x(), point.y()] for point in self.current.points],
+                points=self.current.coords.tolist(),
                 point_labels=self.current.point_labels,
             )
             y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
@@ -833,9 +1253,11 @@ class Canvas(QtWidgets.QWidget):
                 point_labels=[1, 1],
                 mask=mask[y1 : y2 + 1, x1 : x2 + 1],
             )
+        self.current.highlightClear()
         self.current.close()
 
         self.shapes.append(self.current)
+        self._shapeIndex.add(self.current)
         self.storeShapes()
         self.current = None
         self.setHiding(False)
@@ -979,7 +1401,9 @@ class Canvas(QtWidgets.QWidget):
         elif self.editing():
             if self.movingShape and self.selectedShapes:
                 index = self.shapes.index(self.selectedShapes[0])
-                if self.shapesBackups[-1][index].points != self.shapes[index].points:
+                if not np.array_equal(
+                    self.shapesBackups[-1][index].coords, self.shapes[index].coords
+                ):
                     self.storeShapes()
                     self.shapeMoved.emit()
 
@@ -996,6 +1420,7 @@ class Canvas(QtWidgets.QWidget):
     def undoLastLine(self):
         assert self.shapes
         self.current = self.shapes.pop()
+        self._shapeIndex.remove(self.current)
         self.current.setOpen()
         self.current.restoreShapeRaw()
         if self.createMode in ["polygon", "linestrip"]:
@@ -1017,21 +1442,34 @@ class Canvas(QtWidgets.QWidget):
             self.drawingPolygon.emit(False)
         self.update()
 
+    def loadImage(self, image, clear_shapes=True):
+        """Load the image as a pixmap, or by tiles if it is large."""
+        min_size = self._tiled_image["min_size"]
+        if isinstance(image, ImagePyramid):
+            pixmap = image
+        elif min_size and max(image.width(), image.height()) >= min_size:
+            pixmap = ImagePyramid(image, max_size_mb=self._tiled_image["max_size_mb"])
+        else:
+            pixmap = QtGui.QPixmap.fromImage(image)
+        self.loadPixmap(pixmap, clear_shapes=clear_shapes)
+
     def loadPixmap(self, pixmap, clear_shapes=True):
         self.pixmap = pixmap
         if self._ai_model:
-            self._ai_model.set_image(
-                image=labelme.utils.img_qt_to_arr(self.pixmap.toImage())
-            )
+            self._ai_model.set_image(image=_qimage_to_ai_image(self.pixmap.toImage()))
         if clear_shapes:
             self.shapes = []
+            self._shapeIndex = _ShapeIndex(self.shapes)
         self.update()
 
     def loadShapes(self, shapes, replace=True):
         if replace:
             self.shapes = list(shapes)
+            self._shapeIndex = _ShapeIndex(self.shapes)
         else:
             self.shapes.extend(shapes)
+            for shape in shapes:
+                self._shapeIndex.add(shape)
         self.storeShapes()
         self.current = None
         self.hShape = None
@@ -1055,4 +1493,5 @@ class Canvas(QtWidgets.QWidget):
         self.restoreCursor()
         self.pixmap = None
         self.shapesBackups = []
+        self._shapeSnapshots = {}
         self.update()
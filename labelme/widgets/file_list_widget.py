@@ -0,0 +1,361 @@
+import os
+import os.path as osp
+import re
+import threading
+import time
+
+import natsort
+from qtpy import QtCore
+from qtpy import QtWidgets
+from qtpy.QtCore import Qt
+
+
+def _get_directory_entries(dirpath, cache):
+    try:
+        mtime = os.stat(dirpath).st_mtime_ns
+    except OSError:
+        return []
+    cached = cache.get(dirpath)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    entries = []
+    try:
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                try:
+                    # symlinks to directories are not followed as os.walk
+                    is_dir = entry.is_dir() and not entry.is_symlink()
+                except OSError:
+                    continue
+                entries.append((entry.name, is_dir))
+    except OSError:
+        return []
+    # sort in each directory, so files can be listed before the scan ends
+    os_sort_key = natsort.os_sort_keygen()
+    entries.sort(key=lambda entry: os_sort_key(entry[0]))
+    cache[dirpath] = (mtime, entries)
+    return entries
+
+
+def iter_image_files(dirpath, extensions, is_cancelled=None, cache=None):
+    """Yield image files under the directory, depth first in os_sorted order.
+
+    If cache is given, listings of directories are kept in it by their
+    modification time, so scanning the same directory again with it only
+    stats the directories.
+    """
+    extensions = tuple(extensions)
+    if cache is None:
+        cache = {}
+    for name, is_dir in _get_directory_entries(dirpath, cache):
+        if is_cancelled is not None and is_cancelled():
+            return
+        path = osp.join(dirpath, name)
+        if is_dir:
+            yield from iter_image_files(path, extensions, is_cancelled, cache)
+        elif name.lower().endswith(extensions):
+            yield osp.normpath(path)
+
+
+class ImageFileScanner(QtCore.QObject):
+    """Scans a directory for image files in a background thread.
+
+    Found files are sent in batches by filesFound, and starting a new scan
+    cancels the previous one.
+    """
+
+    filesFound = QtCore.Signal(list)
+    finished = QtCore.Signal()
+
+    _batchFound = QtCore.Signal(int, list, bool)
+
+    BATCH_SIZE = 1000
+    BATCH_INTERVAL = 0.2  # [s]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._generation = 0
+        self._cancel_event = None
+        # dirpath -> (mtime, sorted [(name, is_dir), ...]) of the directory
+        # last scanned, so rescans of it are fast and the others are freed
+        self._dirpath = None
+        self._directory_entries = {}
+        self._batchFound.connect(self._onBatchFound)
+
+    def scan(self, dirpath, extensions):
+        self.cancel()
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        if dirpath != self._dirpath:
+            self._dirpath = dirpath
+            self._directory_entries = {}
+        threading.Thread(
+            target=self._scan,
+            args=(
+                self._generation,
+                dirpath,
+                extensions,
+                self._cancel_event,
+                self._directory_entries,
+            ),
+            daemon=True,
+        ).start()
+
+    def cancel(self):
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            self._cancel_event = None
+
+    def _scan(self, generation, dirpath, extensions, cancel_event, cache):
+        batch = []
+        t_batch = time.time()
+        for filename in iter_image_files(
+            dirpath, extensions, is_cancelled=cancel_event.is_set, cache=cache
+        ):
+            batch.append(filename)
+            if (
+                len(batch) >= self.BATCH_SIZE
+                or time.time() - t_batch > self.BATCH_INTERVAL
+            ):
+                self._batchFound.emit(generation, batch, False)
+                batch = []
+                t_batch = time.time()
+        if not cancel_event.is_set():
+            self._batchFound.emit(generation, batch, True)
+
+    def _onBatchFound(self, generation, filenames, finished):
+        if generation != self._generation:
+            return
+        if filenames:
+            self.filesFound.emit(filenames)
+        if finished:
+            self._cancel_event = None
+            self.finished.emit()
+
+
+class FileListModel(QtCore.QAbstractListModel):
+    """List of image files with the check state of their label files.
+
+    All the filenames are kept in memory, and the rows are those matching
+    the filter pattern with a filename -> row dict, so lookups and
+    filtering do not touch the filesystem. Whether the label file exists is
+    checked in a background thread, and unchecked until then.
+    """
+
+    _labelFilesChecked = QtCore.Signal(int, list)
+
+    CHECK_BATCH_SIZE = 1000
+
+    def __init__(self, get_label_file, parent=None):
+        super().__init__(parent)
+        self._all_filenames = []
+        self._all_filenames_set = set()
+        self._checked_filenames = set()
+        self._filter_regex = None
+        self._filenames = []
+        self._rows = {}
+        self._get_label_file = get_label_file
+        self._generation = 0
+        self._labelFilesChecked.connect(self._onLabelFilesChecked)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._filenames)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        filename = self._filenames[index.row()]
+        if role == Qt.DisplayRole:
+            return filename
+        if role == Qt.CheckStateRole:
+            if filename in self._checked_filenames:
+                return Qt.Checked
+            return Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    @property
+    def filenames(self):
+        return self._filenames
+
+    def row(self, filename):
+        return self._rows.get(filename, -1)
+
+    def _filter(self, filenames):
+        if self._filter_regex is None:
+            return filenames
+        search = self._filter_regex.search
+        return [filename for filename in filenames if search(filename)]
+
+    def setFilterPattern(self, pattern):
+        try:
+            filter_regex = re.compile(pattern) if pattern else None
+        except re.error:
+            filter_regex = None
+        if filter_regex == self._filter_regex:
+            return
+
+        self.beginResetModel()
+        self._filter_regex = filter_regex
+        self._filenames = self._filter(self._all_filenames)
+        self._rows = {filename: row for row, filename in enumerate(self._filenames)}
+        self.endResetModel()
+
+    def setFilenames(self, filenames):
+        self.beginResetModel()
+        self._all_filenames = []
+        self._all_filenames_set = set()
+        self._checked_filenames = set()
+        self._filenames = []
+        self._rows = {}
+        self._generation += 1
+        self.endResetModel()
+        self.addFilenames(filenames)
+
+    def addFilenames(self, filenames):
+        filenames = [
+            filename
+            for filename in dict.fromkeys(filenames)
+            if filename not in self._all_filenames_set
+        ]
+        if not filenames:
+            return
+        self._all_filenames.extend(filenames)
+        self._all_filenames_set.update(filenames)
+
+        threading.Thread(
+            target=self._checkLabelFiles,
+            args=(self._generation, filenames, self._get_label_file),
+            daemon=True,
+        ).start()
+
+        filenames = self._filter(filenames)
+        if not filenames:
+            return
+        start = len(self._filenames)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(filenames) - 1)
+        self._filenames.extend(filenames)
+        self._rows.update(
+            (filename, row) for row, filename in enumerate(filenames, start=start)
+        )
+        self.endInsertRows()
+
+    def refreshLabelFiles(self):
+        self._generation += 1
+        self._checked_filenames = set()
+        self._emitCheckStateChanged()
+        if self._all_filenames:
+            threading.Thread(
+                target=self._checkLabelFiles,
+                args=(
+                    self._generation,
+                    list(self._all_filenames),
+                    self._get_label_file,
+                ),
+                daemon=True,
+            ).start()
+
+    def setChecked(self, filename, checked):
+        if checked:
+            self._checked_filenames.add(filename)
+        else:
+            self._checked_filenames.discard(filename)
+        row = self.row(filename)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+
+    def _emitCheckStateChanged(self):
+        if self._filenames:
+            self.dataChanged.emit(
+                self.index(0),
+                self.index(len(self._filenames) - 1),
+                [Qt.CheckStateRole],
+            )
+
+    def _checkLabelFiles(self, generation, filenames, get_label_file):
+        for i in range(0, len(filenames), self.CHECK_BATCH_SIZE):
+            if generation != self._generation:
+                return
+            checked_filenames = [
+                filename
+                for filename in filenames[i : i + self.CHECK_BATCH_SIZE]
+                if osp.exists(get_label_file(filename))
+            ]
+            if checked_filenames:
+                self._labelFilesChecked.emit(generation, checked_filenames)
+
+    def _onLabelFilesChecked(self, generation, checked_filenames):
+        if generation != self._generation:
+            return
+        self._checked_filenames.update(checked_filenames)
+        # only the rows of the batch, as a batch is a range of the filenames
+        rows = [self.row(filename) for filename in checked_filenames]
+        rows = [row for row in rows if row >= 0]
+        if rows:
+            self.dataChanged.emit(
+                self.index(min(rows)), self.index(max(rows)), [Qt.CheckStateRole]
+            )
+
+
+class FileListWidget(QtWidgets.QListView):
+    itemSelectionChanged = QtCore.Signal()
+
+    def __init__(self, get_label_file, parent=None):
+        super().__init__(parent)
+        self.setModel(FileListModel(get_label_file=get_label_file, parent=self))
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.setUniformItemSizes(True)
+        # lay out items in batches so that a large list shows up immediately
+        self.setLayoutMode(QtWidgets.QListView.Batched)
+        self.setBatchSize(10000)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+    def selectionChanged(self, selected, deselected):
+        super().selectionChanged(selected, deselected)
+        self.itemSelectionChanged.emit()
+
+    def count(self):
+        return self.model().rowCount()
+
+    def filenames(self):
+        return self.model().filenames
+
+    def row(self, filename):
+        return self.model().row(filename)
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+    def setCurrentRow(self, row):
+        self.setCurrentIndex(self.model().index(row))
+
+    def currentFilename(self):
+        row = self.currentRow()
+        if row < 0:
+            return None
+        return self.model().filenames[row]
+
+    def selectedFilenames(self):
+        filenames = self.model().filenames
+        return [filenames[index.row()] for index in self.selectedIndexes()]
+
+    def setFilenames(self, filenames):
+        self.model().setFilenames(filenames)
+
+    def setFilterPattern(self, pattern):
+        self.model().setFilterPattern(pattern)
+
+    def addFilenames(self, filenames):
+        self.model().addFilenames(filenames)
+
+    def refreshLabelFiles(self):
+        self.model().refreshLabelFiles()
+
+    def setChecked(self, filename, checked):
+        self.model().setChecked(filename, checked)
@@ -0,0 +1,241 @@
+import collections
+import math
+
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.logger import logger
+
+
+class ImagePyramid:
+    """Renders a large image by tiles of a multi-resolution pyramid.
+
+    Level k of the pyramid is the image downscaled by 2**k, split into tiles
+    of tile_size. Tiles are made lazily, kept in an LRU bounded by
+    max_size_mb, and only the ones in the visible region are painted.
+
+    The image is a QImage, or the data of an image file. If the reader of the
+    file can decode a region (e.g., JPEG), the missing tiles of a paint are
+    decoded at once from the file, so the full image is never held in memory.
+    Otherwise, the file is decoded on the first paint, level 0 is drawn from
+    the image itself, and the tiles are made from the four tiles of the finer
+    level.
+
+    It has the part of the QPixmap interface used by Canvas, so it can be
+    loaded in place of the pixmap.
+    """
+
+    def __init__(self, image, tile_size=512, max_size_mb=256):
+        if isinstance(image, QtGui.QImage):
+            self._data = None
+            self._image = self._convertImage(image)
+            self._size = image.size()
+            self._can_read_region = False
+        else:
+            self._data = QtCore.QByteArray(image)
+            self._image = None
+            reader = self._createReader()
+            self._size = reader.size() if reader.canRead() else QtCore.QSize()
+            self._can_read_region = reader.supportsOption(
+                QtGui.QImageIOHandler.ClipRect
+            )
+        self._tile_size = tile_size
+        self._max_size = max_size_mb * 1024**2
+        self._max_level = max(
+            0,
+            math.ceil(
+                math.log2(max(self._size.width(), self._size.height(), 1) / tile_size)
+            ),
+        )
+        self._tiles = collections.OrderedDict()
+        self._nbytes = 0
+
+    @staticmethod
+    def _convertImage(image):
+        if image.hasAlphaChannel():
+            image_format = QtGui.QImage.Format_ARGB32_Premultiplied
+        else:
+            image_format = QtGui.QImage.Format_RGB32
+        # the format the raster engine draws without converting the image,
+        # converted in place so the image is not copied
+        if image.format() != image_format:
+            image.convertTo(image_format)
+        return image
+
+    def _createReader(self):
+        buffer = QtCore.QBuffer()
+        buffer.setData(self._data)
+        buffer.open(QtCore.QIODevice.ReadOnly)
+        reader = QtGui.QImageReader(buffer)
+        # the device is not owned by the reader
+        reader.buffer = buffer
+        return reader
+
+    def width(self):
+        return self._size.width()
+
+    def height(self):
+        return self._size.height()
+
+    def size(self):
+        return QtCore.QSize(self._size)
+
+    def isNull(self):
+        return self._size.isEmpty()
+
+    def __bool__(self):
+        return not self.isNull()
+
+    def toImage(self):
+        """Return the full image, decoding the file if it is not held."""
+        if self._image is not None:
+            return self._image
+        if self._data is None:
+            return QtGui.QImage()
+        # not held, as the pyramid is to bound the memory
+        return self._createReader().read()
+
+    def _getImage(self):
+        if self._image is None:
+            self._image = self._convertImage(self.toImage())
+        return self._image
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def level(self, scale):
+        if scale <= 0:
+            return self._max_level
+        return min(self._max_level, max(0, math.floor(math.log2(1 / scale))))
+
+    def _getTileRect(self, level, col, row):
+        # the rect of the tile in the image coordinates
+        size = self._tile_size * 2**level
+        return QtCore.QRect(col * size, row * size, size, size).intersected(
+            QtCore.QRect(QtCore.QPoint(0, 0), self._size)
+        )
+
+    def _getScaledSize(self, rect, level):
+        return QtCore.QSize(
+            math.ceil(rect.width() / 2**level), math.ceil(rect.height() / 2**level)
+        )
+
+    def _addTile(self, key, tile):
+        self._tiles[key] = tile
+        self._nbytes += tile.sizeInBytes()
+        while self._nbytes > self._max_size and len(self._tiles) > 1:
+            _, evicted = self._tiles.popitem(last=False)
+            self._nbytes -= evicted.sizeInBytes()
+
+    def _getTile(self, level, col, row):
+        key = (level, col, row)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        image = self._getImage()
+        rect = self._getTileRect(level, col, row)
+        size = self._getScaledSize(rect, level)
+        tile = QtGui.QImage(size.width(), size.height(), image.format())
+        tile.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(tile)
+        painter.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
+        # halving averages the 2x2 pixels of the finer level
+        painter.scale(0.5, 0.5)
+        for child_row in (2 * row, 2 * row + 1):
+            for child_col in (2 * col, 2 * col + 1):
+                child_rect = self._getTileRect(level - 1, child_col, child_row)
+                if child_rect.isEmpty():
+                    continue
+                point = QtCore.QPoint(
+                    (child_col - 2 * col) * self._tile_size,
+                    (child_row - 2 * row) * self._tile_size,
+                )
+                if level == 1:
+                    painter.drawImage(point, image, child_rect)
+                else:
+                    painter.drawImage(
+                        point, self._getTile(level - 1, child_col, child_row)
+                    )
+        painter.end()
+
+        self._addTile(key, tile)
+        return tile
+
+    def _readTiles(self, level, keys):
+        tiles = {}
+        for key in keys:
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                tiles[key] = tile
+        missing = [key for key in keys if key not in tiles]
+        if not missing:
+            return [tiles[key] for key in keys]
+
+        # decoding the file up to the region is most of the cost, so the
+        # region of all the missing tiles is decoded at once
+        region_rect = QtCore.QRect()
+        for key in missing:
+            region_rect = region_rect.united(self._getTileRect(*key))
+        reader = self._createReader()
+        reader.setClipRect(region_rect)
+        reader.setScaledSize(self._getScaledSize(region_rect, level))
+        region = reader.read()
+        if region.isNull():
+            logger.error(
+                "Failed to decode image tiles: {}".format(reader.errorString())
+            )
+        else:
+            region = self._convertImage(region)
+
+        for key in missing:
+            rect = self._getTileRect(*key)
+            if region.isNull():
+                tile = QtGui.QImage()
+            else:
+                point = (rect.topLeft() - region_rect.topLeft()) / 2**level
+                tile = region.copy(
+                    QtCore.QRect(point, self._getScaledSize(rect, level))
+                )
+            tiles[key] = tile
+            self._addTile(key, tile)
+        return [tiles[key] for key in keys]
+
+    def paint(self, painter, rect, scale):
+        """Paint the tiles intersecting rect in the image coordinates."""
+        rect = rect.toAlignedRect().intersected(
+            QtCore.QRect(QtCore.QPoint(0, 0), self._size)
+        )
+        if rect.isEmpty():
+            return
+
+        painter.save()
+        # antialiased edges of the tiles would show the seams
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, False)
+
+        level = self.level(scale)
+        if level == 0 and not self._can_read_region:
+            painter.drawImage(rect, self._getImage(), rect)
+            painter.restore()
+            return
+
+        size = self._tile_size * 2**level
+        keys = [
+            (level, col, row)
+            for row in range(rect.top() // size, rect.bottom() // size + 1)
+            for col in range(rect.left() // size, rect.right() // size + 1)
+        ]
+        if self._can_read_region:
+            tiles = self._readTiles(level, keys)
+        else:
+            tiles = [self._getTile(*key) for key in keys]
+        for key, tile in zip(keys, tiles):
+            painter.drawImage(
+                QtCore.QRectF(self._getTileRect(*key)),
+                tile,
+                QtCore.QRectF(tile.rect()),
+            )
+        painter.restore()
@@ -108,6 +108,8 @@ class LabelListWidget(QtWidgets.QListView):
     def __init__(self):
         super(LabelListWidget, self).__init__()
         self._selectedItems = []
+        # shape -> item, which follows the rows of the model also on drops
+        self._itemsByShape = {}
 
         self.setWindowFlags(Qt.Window)
         self.setModel(StandardItemModel())
@@ -119,6 +121,10 @@ class LabelListWidget(QtWidgets.QListView):
 
         self.doubleClicked.connect(self.itemDoubleClickedEvent)
         self.selectionModel().selectionChanged.connect(self.itemSelectionChangedEvent)
+        self.model().rowsInserted.connect(self._onRowsInserted)
+        self.model().itemChanged.connect(self._onItemChanged)
+        self.model().rowsAboutToBeRemoved.connect(self._onRowsAboutToBeRemoved)
+        self.model().modelReset.connect(self._itemsByShape.clear)
 
     def __len__(self):
         return self.model().rowCount()
@@ -138,6 +144,26 @@ class LabelListWidget(QtWidgets.QListView):
     def itemChanged(self):
         return self.model().itemChanged
 
+    def _onRowsInserted(self, parent, first, last):
+        for row in range(first, last + 1):
+            item = self.model().item(row)
+            if item is not None and item.shape() is not None:
+                self._itemsByShape[item.shape()] = item
+
+    def _onItemChanged(self, item):
+        # dropped items are inserted empty, and then their data are set
+        if item.shape() is not None:
+            self._itemsByShape[item.shape()] = item
+
+    def _onRowsAboutToBeRemoved(self, parent, first, last):
+        for row in range(first, last + 1):
+            item = self.model().item(row)
+            if item is None:
+                continue
+            # a dropped item is inserted before its source row is removed
+            if self._itemsByShape.get(item.shape()) is item:
+                del self._itemsByShape[item.shape()]
+
     def itemSelectionChangedEvent(self, selected, deselected):
         selected = [self.model().itemFromIndex(i) for i in selected.indexes()]
         deselected = [self.model().itemFromIndex(i) for i in deselected.indexes()]
@@ -153,25 +179,53 @@ class LabelListWidget(QtWidgets.QListView):
         self.scrollTo(self.model().indexFromItem(item))
 
     def addItem(self, item):
-        if not isinstance(item, LabelListWidgetItem):
-            raise TypeError("item must be LabelListWidgetItem")
-        self.model().setItem(self.model().rowCount(), 0, item)
-        item.setSizeHint(self.itemDelegate().sizeHint(None, None))
+        self.addItems([item])
+
+    def addItems(self, items):
+        """Append the items as rows at once."""
+        for item in items:
+            if not isinstance(item, LabelListWidgetItem):
+                raise TypeError("item must be LabelListWidgetItem")
+        size_hint = self.itemDelegate().sizeHint(None, None)
+        for item in items:
+            item.setSizeHint(size_hint)
+        self.model().invisibleRootItem().appendRows(items)
 
     def removeItem(self, item):
-        index = self.model().indexFromItem(item)
-        self.model().removeRows(index.row(), 1)
+        self.removeItems([item])
+
+    def _getRowRanges(self, items):
+        # [(first, last), ...] of the consecutive rows of the items
+        rows = sorted(self.model().indexFromItem(item).row() for item in items)
+        ranges = []
+        for row in rows:
+            if ranges and row <= ranges[-1][1] + 1:
+                ranges[-1][1] = row
+            else:
+                ranges.append([row, row])
+        return ranges
+
+    def removeItems(self, items):
+        """Remove the items with one removal per range of consecutive rows."""
+        # not by model().removeRows, which is for the drops of items
+        root = self.model().invisibleRootItem()
+        for first, last in reversed(self._getRowRanges(items)):
+            root.removeRows(first, last - first + 1)
 
     def selectItem(self, item):
-        index = self.model().indexFromItem(item)
-        self.selectionModel().select(index, QtCore.QItemSelectionModel.Select)
+        self.selectItems([item])
+
+    def selectItems(self, items):
+        selection = QtCore.QItemSelection()
+        for first, last in self._getRowRanges(items):
+            selection.select(self.model().index(first, 0), self.model().index(last, 0))
+        self.selectionModel().select(selection, QtCore.QItemSelectionModel.Select)
 
     def findItemByShape(self, shape):
-        for row in range(self.model().rowCount()):
-            item = self.model().item(row, 0)
-            if item.shape() == shape:
-                return item
-        raise ValueError("cannot find shape: {}".format(shape))
+        item = self._itemsByShape.get(shape)
+        if item is None:
+            raise ValueError("cannot find shape: {}".format(shape))
+        return item
 
     def clear(self):
         self.model().clear()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+import argparse
+import os
+import os.path as osp
+import shutil
+import tempfile
+import time
+
+from labelme.label_file import LabelFile
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../labelme_tests/data")
+
+
+def _copy_label_files(out_dir, num_copies):
+    json_files = []
+    for name in ["annotated", "annotated_with_data"]:
+        for i in range(num_copies):
+            dst_dir = osp.join(out_dir, "{}_{}".format(name, i))
+            shutil.copytree(osp.join(data_dir, name), dst_dir)
+            json_files += [
+                osp.join(dst_dir, filename)
+                for filename in sorted(os.listdir(dst_dir))
+                if filename.endswith(".json")
+            ]
+    return json_files
+
+
+def _benchmark(json_files, load_image):
+    t_start = time.perf_counter()
+    for json_file in json_files:
+        LabelFile(json_file, load_image=load_image)
+    return len(json_files) / (time.perf_counter() - t_start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark LabelFile.load with and without the image data."
+    )
+    parser.add_argument("--num-copies", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        json_files = _copy_label_files(tmp_dir, num_copies=args.num_copies)
+        print("# of label files:", len(json_files))
+        for load_image in [True, False]:
+            # the best of the runs, as the first one warms the page cache
+            files_per_sec = max(
+                _benchmark(json_files, load_image=load_image)
+                for _ in range(args.repeat)
+            )
+            print("load_image={}: {:.0f} files/s".format(load_image, files_per_sec))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+
+from labelme.utils.shape import shape_to_mask
+from labelme.utils.shape import shapes_to_label
+
+
+def _shapes_to_label_per_shape(img_shape, shapes, label_name_to_value):
+    # the implementation before the canvas reuse, with a mask of the image
+    # size for each shape
+    cls = np.zeros(img_shape[:2], dtype=np.int32)
+    ins = np.zeros_like(cls)
+    instances = []
+    for shape in shapes:
+        group_id = shape.get("group_id")
+        if group_id is None:
+            group_id = uuid.uuid1()
+        instance = (shape["label"], group_id)
+        if instance not in instances:
+            instances.append(instance)
+        mask = shape_to_mask(img_shape[:2], shape["points"], shape.get("shape_type"))
+        cls[mask] = label_name_to_value[shape["label"]]
+        ins[mask] = instances.index(instance) + 1
+    return cls, ins
+
+
+def _make_shapes(height, width, num_shapes, num_vertices, seed=0):
+    random_state = np.random.RandomState(seed)
+    shapes = []
+    for i in range(num_shapes):
+        center = random_state.uniform(0, [width, height])
+        radius = random_state.uniform(10, 100)
+        angles = np.sort(random_state.uniform(0, 2 * np.pi, num_vertices))
+        points = center + radius * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+        shapes.append(
+            dict(
+                label="label_{}".format(i % 10),
+                points=points.tolist(),
+                shape_type="polygon",
+                group_id=i,
+            )
+        )
+    return shapes
+
+
+def _benchmark(fn, img_shape, shapes, label_name_to_value, repeat):
+    times = []
+    for _ in range(repeat):
+        t_start = time.perf_counter()
+        result = fn(img_shape, shapes, label_name_to_value)
+        times.append(time.perf_counter() - t_start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark shapes_to_label against the per shape masks."
+    )
+    parser.add_argument("--height", type=int, default=2160)
+    parser.add_argument("--width", type=int, default=3840)
+    parser.add_argument("--num-shapes", type=int, default=500)
+    parser.add_argument("--num-vertices", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    img_shape = (args.height, args.width, 3)
+    shapes = _make_shapes(args.height, args.width, args.num_shapes, args.num_vertices)
+    label_name_to_value = {"label_{}".format(i): i + 1 for i in range(10)}
+    print(
+        "{}x{} image, {} polygons of {} vertices".format(
+            args.width, args.height, args.num_shapes, args.num_vertices
+        )
+    )
+
+    results = []
+    for name, fn in [
+        ("per shape", _shapes_to_label_per_shape),
+        ("shapes_to_label", shapes_to_label),
+    ]:
+        seconds, result = _benchmark(
+            fn, img_shape, shapes, label_name_to_value, repeat=args.repeat
+        )
+        results.append(result)
+        print("{}: {:.3f} s".format(name, seconds))
+
+    for expected, actual in zip(results[0], results[1]):
+        np.testing.assert_array_equal(actual, expected)
+    print("Outputs are equal.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+
+from labelme.ai.embedding_cache import DiskEmbeddingCache
+from labelme.ai.embedding_cache import MemoryEmbeddingCache
+from labelme.ai.embedding_cache import get_image_hash
+
+
+def test_DiskEmbeddingCache(tmp_path):
+    cache = DiskEmbeddingCache(cache_dir=str(tmp_path), max_size_mb=1)
+
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    key = cache.get_key(model_name="model", image_hash=get_image_hash(image))
+    assert cache.get(key) is None
+
+    embedding = np.random.uniform(size=(1, 256, 16, 16)).astype(np.float32)
+    cache.put(key, embedding)
+    np.testing.assert_array_equal(cache.get(key), embedding)
+
+    image[0, 0, 0] = 1
+    assert get_image_hash(image) not in key
+
+    # each file is a bit larger than 256KB, so only 3 of them fit in 1MB
+    for i in range(8):
+        cache.put("key-{}".format(i), embedding)
+    assert cache.get(key) is None
+    assert cache.get("key-7") is not None
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_MemoryEmbeddingCache():
+    cache = MemoryEmbeddingCache(max_entries=2)
+
+    embedding = np.zeros((1, 256, 16, 16), dtype=np.float32)
+    cache.put("a", embedding)
+    cache.put("b", embedding)
+    assert cache.get("a") is embedding
+    cache.put("c", embedding)  # evicts "b"
+    assert cache.get("b") is None
+
+    assert cache.stats() == dict(
+        hits=1, misses=1, entries=2, nbytes=2 * embedding.nbytes
+    )
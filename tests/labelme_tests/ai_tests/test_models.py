@@ -0,0 +1,55 @@
+import numpy as np
+import onnxruntime
+import pytest
+
+from labelme.ai.efficient_sam import EfficientSam
+from labelme.ai.segment_anything_model import SegmentAnythingModel
+
+
+class _InferenceSession:
+    num_encoder_runs = 0
+
+    def __init__(self, path):
+        self._path = path
+
+    def run(self, output_names, input_feed):
+        if "encoder" in self._path:
+            _InferenceSession.num_encoder_runs += 1
+            return [np.zeros((1, 256, 64, 64), dtype=np.float32)]
+        # a square in the middle of the image for each query
+        height, width = input_feed["orig_im_size"]
+        num_queries = input_feed["batched_point_coords"].shape[1]
+        masks = np.full((1, num_queries, 3, height, width), -1, dtype=np.float32)
+        masks[:, :, :, height // 4 : height * 3 // 4, width // 4 : width * 3 // 4] = 1
+        return masks, None, None
+
+
+@pytest.mark.parametrize("model_class", [EfficientSam, SegmentAnythingModel])
+def test_model_without_embedding_cache(monkeypatch, model_class):
+    monkeypatch.setattr(onnxruntime, "InferenceSession", _InferenceSession)
+    model = model_class(
+        encoder_path="encoder.onnx", decoder_path="decoder.onnx", embedding_cache=None
+    )
+    image = np.zeros((40, 40, 3), dtype=np.uint8)
+
+    embedding = model.compute_image_embedding(image=image)
+    assert embedding.shape == (1, 256, 64, 64)
+
+    model.set_image(image=image)
+    assert model._get_image_embedding() is not None
+    if model_class is EfficientSam:
+        polygon = model.predict_polygon_from_points(points=[[20, 20]], point_labels=[1])
+        assert len(polygon) >= 3
+
+
+@pytest.mark.parametrize("model_class", [EfficientSam, SegmentAnythingModel])
+def test_model_set_image_with_embedding(monkeypatch, model_class):
+    monkeypatch.setattr(onnxruntime, "InferenceSession", _InferenceSession)
+    model = model_class(encoder_path="encoder.onnx", decoder_path="decoder.onnx")
+    image = np.zeros((40, 40, 3), dtype=np.uint8)
+    embedding = np.ones((1, 256, 64, 64), dtype=np.float32)
+
+    monkeypatch.setattr(_InferenceSession, "num_encoder_runs", 0)
+    model.set_image(image=image, image_embedding=embedding)
+    assert model._get_image_embedding() is embedding
+    assert _InferenceSession.num_encoder_runs == 0
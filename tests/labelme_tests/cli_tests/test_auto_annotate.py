@@ -0,0 +1,84 @@
+import json
+import os.path as osp
+import threading
+
+import numpy as np
+import PIL.Image
+
+from labelme import ai
+from labelme.cli import auto_annotate
+
+
+class _Model:
+    def __init__(self):
+        self.embedded_images = []
+        self._image = None
+
+    def compute_image_embedding(self, image):
+        self.embedded_images.append(image.shape)
+        return image.shape
+
+    def set_image(self, image, image_embedding=None):
+        # the embedding is passed from the encoder stage
+        assert image_embedding == image.shape
+        if image.shape[1] == 30:
+            raise RuntimeError("failed to decode")
+        self._image = image
+
+    def predict_masks_from_prompts(self, prompts):
+        masks = []
+        for prompt in prompts:
+            x1, y1, x2, y2 = prompt["box"]
+            mask = np.zeros(self._image.shape[:2], dtype=bool)
+            mask[int(y1) : int(y2), int(x1) : int(x2)] = True
+            masks.append(mask)
+        return masks
+
+
+def _get_rectangles_from_texts(model, image, texts):
+    boxes = np.array([[5, 5, 15, 15]], dtype=np.float32)
+    return boxes, np.array([0.9], dtype=np.float32), np.array([0])
+
+
+def _non_maximum_suppression(boxes, scores, labels, **kwargs):
+    return boxes, scores, labels
+
+
+def test_annotate_images(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai, "get_rectangles_from_texts", _get_rectangles_from_texts)
+    monkeypatch.setattr(ai, "non_maximum_suppression", _non_maximum_suppression)
+
+    input_dir = tmp_path / "images"
+    (input_dir / "sub").mkdir(parents=True)
+    for name, width in [("a.png", 20), ("sub/b.png", 20), ("c.png", 30)]:
+        PIL.Image.fromarray(np.zeros((20, width, 3), dtype=np.uint8)).save(
+            input_dir / name
+        )
+    (input_dir / "broken.png").write_bytes(b"not an image")
+    out_dir = tmp_path / "out"
+
+    image_files = auto_annotate.get_image_files(str(input_dir))
+    assert len(image_files) == 4
+    model = _Model()
+    stats = auto_annotate.annotate_images(
+        image_files=image_files,
+        input_dir=str(input_dir),
+        out_dir=str(out_dir),
+        texts=["dog"],
+        model=model,
+        queue_size=1,
+    )
+
+    # the broken image fails in the reader, and c.png in the decoder
+    assert stats["images"] == 2
+    assert stats["failed"] == 2
+    assert len(model.embedded_images) == 3
+    assert not any(isinstance(t, auto_annotate._Stage) for t in threading.enumerate())
+
+    for name in ["a.json", "sub/b.json"]:
+        with open(osp.join(out_dir, name)) as f:
+            data = json.load(f)
+        assert data["imageData"] is None
+        assert [shape["label"] for shape in data["shapes"]] == ["dog"]
+        assert data["shapes"][0]["shape_type"] == "polygon"
+    assert not osp.exists(osp.join(out_dir, "c.json"))
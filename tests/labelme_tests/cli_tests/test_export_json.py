@@ -0,0 +1,125 @@
+import json
+import os
+import os.path as osp
+import shutil
+
+import numpy as np
+import PIL.Image
+import pytest
+
+from labelme.cli import export_json
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../data")
+
+
+def _copy_annotated(input_dir):
+    (input_dir / "sub").mkdir(parents=True)
+    for name, dst in [
+        ("2011_000003", input_dir),
+        ("2011_000006", input_dir),
+        ("2011_000025", input_dir / "sub"),
+    ]:
+        for ext in [".json", ".jpg"]:
+            shutil.copy(osp.join(data_dir, "annotated", name + ext), dst)
+
+
+def test_load_json_value(tmp_path):
+    json_file = osp.join(data_dir, "annotated_with_data/apc2016_obj3.json")
+    with open(json_file) as f:
+        data = json.load(f)
+    for chunk_size in [1, 7, 2**16]:
+        for key in data:
+            assert (
+                export_json.load_json_value(json_file, key, chunk_size=chunk_size)
+                == data[key]
+            )
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        # numbers, strings with escapes and delimiters, and whitespace
+        '{"a": -1.5e+3, "b": 12345,\n "c": "x\\"}\\\\,:{", "d": "\\u00e9"}',
+        # keys out of order, and nested keys of the same name
+        '{"d": {"a": 0}, "c": [{"b": "a"}], "b": null, "a": true}',
+        ' { "a" : 1 , "b" : [ ] , "c" : { } , "d" : 0.25 } ',
+    ],
+)
+def test_load_json_value_chunks(tmp_path, text):
+    json_file = tmp_path / "data.json"
+    json_file.write_text(text)
+    data = json.loads(text)
+    # every split of the first chunk
+    for chunk_size in range(1, len(text) + 1):
+        for key in data:
+            assert (
+                export_json.load_json_value(json_file, key, chunk_size=chunk_size)
+                == data[key]
+            )
+
+
+def test_load_json_value_errors(tmp_path):
+    json_file = tmp_path / "data.json"
+    # the values after the key are not decoded
+    json_file.write_text('{"shapes": [1], "imageData": not json')
+    assert export_json.load_json_value(json_file, "shapes", chunk_size=4) == [1]
+
+    json_file.write_text('{"imageData": null}')
+    with pytest.raises(KeyError):
+        export_json.load_json_value(json_file, "shapes")
+    for text in ['{"shapes": [1', '{"shapes" [1]}', '[{"shapes": []}]', ""]:
+        json_file.write_text(text)
+        with pytest.raises(json.JSONDecodeError):
+            export_json.load_json_value(json_file, "shapes", chunk_size=4)
+
+
+def test_export_json_files(tmp_path):
+    input_dir = tmp_path / "data"
+    _copy_annotated(input_dir)
+    (input_dir / "broken.json").write_text('{"shapes": [')
+    out_dir = tmp_path / "out"
+
+    json_files = export_json.get_json_files(str(input_dir))
+    assert len(json_files) == 4
+    export_json.export_json_files(json_files, out=str(out_dir), jobs=2)
+
+    # the broken file fails without aborting the others
+    assert not osp.exists(out_dir / "broken")
+    names = ["2011_000003", "2011_000006", "sub/2011_000025"]
+    for name in names:
+        for filename in ["img.png", "label.png", "label_viz.png"]:
+            assert osp.exists(out_dir / name / filename)
+
+    # label values are shared by all the files
+    label_names = [
+        "_background_",
+        "__ignore__",
+        "bottle",
+        "bus",
+        "car",
+        "chair",
+        "person",
+        "sofa",
+    ]
+    for name in names:
+        with open(out_dir / name / "label_names.txt") as f:
+            assert f.read().splitlines() == label_names
+    lbl = np.asarray(PIL.Image.open(out_dir / "sub/2011_000025/label.png"))
+    assert set(np.unique(lbl)) == {
+        0,
+        label_names.index("bus"),
+        label_names.index("car"),
+    }
+
+    # only the files edited after their export are exported again
+    for name in names:
+        os.utime(out_dir / name / "label.png", (0, 0))
+    os.utime(out_dir / "2011_000006/label_names.txt", (0, 0))
+    export_json.export_json_files(json_files, out=str(out_dir), jobs=2)
+    assert osp.getmtime(out_dir / "2011_000003/label.png") == 0
+    assert osp.getmtime(out_dir / "2011_000006/label.png") > 0
+    assert osp.getmtime(out_dir / "sub/2011_000025/label.png") == 0
+
+    export_json.export_json_files(json_files, out=str(out_dir), jobs=2, force=True)
+    assert osp.getmtime(out_dir / "2011_000003/label.png") > 0
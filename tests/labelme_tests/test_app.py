@@ -3,10 +3,12 @@ import shutil
 import tempfile
 
 import pytest
+from qtpy import QtCore
 
 import labelme.app
 import labelme.config
 import labelme.testing
+from labelme.shape import Shape
 
 here = osp.dirname(osp.abspath(__file__))
 data_dir = osp.join(here, "data")
@@ -112,3 +114,41 @@ def test_MainWindow_annotate_jpg(qtbot):
 
     labelme.testing.assert_labelfile_sanity(out_file)
     shutil.rmtree(tmp_dir)
+
+
+@pytest.mark.gui
+def test_MainWindow_loadShapes(qtbot):
+    win = labelme.app.MainWindow(filename=osp.join(data_dir, "raw/2011_000003.jpg"))
+    qtbot.addWidget(win)
+    _win_show_and_wait_imageData(qtbot, win)
+
+    shapes = []
+    for i in range(100):
+        shape = Shape(label="label_{}".format(i % 3), shape_type="point")
+        shape.addPoint(QtCore.QPointF(i, i))
+        shapes.append(shape)
+    win.loadShapes(shapes)
+
+    assert [item.shape() for item in win.labelList] == shapes
+    assert win.canvas.shapes == shapes
+    for label in ["label_0", "label_1", "label_2"]:
+        assert win.uniqLabelList.findItemByLabel(label) is not None
+    assert shapes[0].fill_color == shapes[3].fill_color
+    assert shapes[0].fill_color != shapes[1].fill_color
+    win.close()
+
+
+@pytest.mark.gui
+def test_MainWindow_readAiImage_without_read_ahead(qtbot):
+    img_file = osp.join(data_dir, "raw/2011_000003.jpg")
+    config = labelme.config.get_default_config()
+    config["read_ahead"]["num_images"] = 0
+    win = labelme.app.MainWindow(config=config, filename=img_file)
+    qtbot.addWidget(win)
+    _win_show_and_wait_imageData(qtbot, win)
+
+    image = win._readAiImage(osp.join(data_dir, "raw/2011_000006.jpg"))
+    assert not image.isNull()
+    # not kept in the read ahead, as it is disabled
+    assert win._readAheadCache.nbytes == 0
+    win.close()
@@ -0,0 +1,44 @@
+import io
+import os.path as osp
+
+import PIL.Image
+
+from labelme.label_file import LabelFile
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def test_LabelFile_load_image_false():
+    json_files = [
+        osp.join(data_dir, "annotated_with_data/apc2016_obj3.json"),
+        osp.join(data_dir, "annotated/2011_000003.json"),
+    ]
+    for json_file in json_files:
+        label_file = LabelFile(json_file)
+        label_file_lazy = LabelFile(json_file, load_image=False)
+
+        assert label_file_lazy.shapes == label_file.shapes
+        assert label_file_lazy.imageHeight == label_file.imageHeight
+        assert label_file_lazy.imageWidth == label_file.imageWidth
+        assert label_file_lazy.imageData == label_file.imageData
+
+
+def test_LabelFile_load_image_file(tmp_path):
+    image_file = osp.join(data_dir, "raw/2011_000003.jpg")
+    with open(image_file, "rb") as f:
+        assert LabelFile.load_image_file(image_file) == f.read()
+
+    # re-encoded with the orientation applied
+    image_pil = PIL.Image.open(image_file)
+    exif = PIL.Image.Exif()
+    exif[0x0112] = 6  # rotate 270
+    rotated_file = str(tmp_path / "rotated.jpg")
+    image_pil.save(rotated_file, exif=exif)
+    image_data = LabelFile.load_image_file(rotated_file)
+    assert PIL.Image.open(io.BytesIO(image_data)).size == image_pil.size[::-1]
+
+    # the size read from the header matches the re-encoded image
+    assert LabelFile._get_image_size(rotated_file, apply_exif_orientation=True) == (
+        image_pil.size
+    )
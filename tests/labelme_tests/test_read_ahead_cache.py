@@ -0,0 +1,44 @@
+from labelme.read_ahead_cache import ReadAheadCache
+
+
+def test_ReadAheadCache():
+    stamps = {}
+    loaded = []
+
+    def load(key):
+        loaded.append(key)
+        if key == "b":
+            stamps[key] = 1  # modified while loading
+        return key.upper(), 1024**2
+
+    # single worker, so items are loaded in the prefetched order
+    cache = ReadAheadCache(
+        load_fn=load, stamp_fn=stamps.get, max_size_mb=2, num_workers=1
+    )
+    cache.prefetch(["a", "b"])
+    assert cache.pop("a") == "A"
+    assert cache.pop("a") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # stale if the stamp changed after loading
+    assert cache.pop("b") is None
+
+    # least recently prefetched is evicted
+    cache.prefetch(["c", "d"])
+    cache.pop("d")
+    cache.prefetch(["e", "f", "g"])
+    cache.pop("g")
+    cache.prefetch([])
+    assert cache.nbytes <= 2 * 1024**2
+    assert cache.pop("c") is None
+    assert cache.pop("f") == "F"
+
+    # get shares the value with pop, loading it only once
+    cache.prefetch(["h"])
+    assert cache.get("h") == "H"
+    assert cache.get("i") == "I"
+    assert cache.pop("h") == "H"
+    assert cache.pop("i") == "I"
+    assert loaded.count("h") == 1
+    assert loaded.count("i") == 1
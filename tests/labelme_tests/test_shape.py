@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.shape import Shape
+
+
+def test_Shape_cache():
+    shape = Shape(label="a", shape_type="polygon")
+    for x, y in [(0, 0), (10, 0), (10, 10), (0, 10)]:
+        shape.addPoint(QtCore.QPointF(x, y))
+    shape.close()
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 10, 10)
+    assert shape.containsPoint(QtCore.QPointF(5, 5))
+
+    shape.moveBy(QtCore.QPointF(20, 0))
+    assert shape.boundingRect() == QtCore.QRectF(20, 0, 10, 10)
+    assert not shape.containsPoint(QtCore.QPointF(5, 5))
+
+    shape.moveVertexBy(1, QtCore.QPointF(10, 0))
+    assert shape.boundingRect() == QtCore.QRectF(20, 0, 20, 10)
+
+    shape.insertPoint(1, QtCore.QPointF(30, -10))
+    assert shape.boundingRect() == QtCore.QRectF(20, -10, 20, 20)
+
+    shape.removePoint(1)
+    assert shape.boundingRect() == QtCore.QRectF(20, 0, 20, 10)
+
+    shape[0] = QtCore.QPointF(0, 0)
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 40, 10)
+
+    # copies do not share the cache
+    shape_copy = shape.copy()
+    shape_copy.moveBy(QtCore.QPointF(0, 100))
+    assert shape_copy.boundingRect() == QtCore.QRectF(0, 100, 40, 10)
+    assert shape.boundingRect() == QtCore.QRectF(0, 0, 40, 10)
+
+
+def test_Shape_coords():
+    shape = Shape(label="a", shape_type="polygon")
+    shape.addPoints([(0, 0), (10, 0), (10, 10), (0, 10), (0, 0)])
+    assert shape.isClosed()
+    assert shape.coords.shape == (4, 2)
+    assert shape.coords.dtype == np.float64
+    assert shape.point_labels == [1, 1, 1, 1]
+    assert shape.points[1] == QtCore.QPointF(10, 0)
+    assert shape[-1] == QtCore.QPointF(0, 10)
+
+    shape.moveBy(QtCore.QPointF(1, 2))
+    assert shape.coords.tolist() == [[1, 2], [11, 2], [11, 12], [1, 12]]
+
+    Shape.scale = 2.0
+    try:
+        assert shape.nearestVertex(QtCore.QPointF(12, 13), epsilon=3) == 2
+        assert shape.nearestVertex(QtCore.QPointF(12, 13), epsilon=2) is None
+        # the edge i is from the vertex i - 1 to i
+        assert shape.nearestEdge(QtCore.QPointF(6, 1), epsilon=3) == 1
+        assert shape.nearestEdge(QtCore.QPointF(0, 7), epsilon=3) == 0
+        assert shape.nearestEdge(QtCore.QPointF(6, 7), epsilon=3) is None
+    finally:
+        Shape.scale = 1.0
+
+
+@pytest.mark.gui
+def test_Shape_paint_mask(qtbot):
+    mask = np.zeros((10, 10), dtype=bool)
+    mask[2:8, 2:8] = True
+    shape = Shape(label="a", shape_type="mask", mask=mask)
+    shape.addPoints([(10, 10), (19, 19)])
+    shape.line_color = QtGui.QColor(0, 0, 0, 0)
+    shape.select_line_color = QtGui.QColor(0, 0, 0, 0)
+    shape.fill_color = QtGui.QColor(255, 0, 0)
+    shape.select_fill_color = QtGui.QColor(0, 0, 255)
+
+    def paint():
+        image = QtGui.QImage(40, 40, QtGui.QImage.Format_ARGB32)
+        image.fill(QtGui.QColor(0, 0, 0))
+        painter = QtGui.QPainter(image)
+        shape.paint(painter)
+        painter.end()
+        return image
+
+    assert paint().pixelColor(15, 15) == QtGui.QColor(255, 0, 0)
+    assert paint().pixelColor(11, 11) == QtGui.QColor(0, 0, 0)
+    shape.selected = True
+    assert paint().pixelColor(15, 15) == QtGui.QColor(0, 0, 255)
+    shape.mask = np.zeros_like(mask)
+    assert paint().pixelColor(15, 15) == QtGui.QColor(0, 0, 0)
+
+
+@pytest.mark.gui
+def test_Shape_paint_vertex(qtbot):
+    shape = Shape(label="a", shape_type="polygon")
+    shape.addPoints([(10, 10), (30, 10), (30, 30)])
+    shape.line_color = QtGui.QColor(0, 0, 0, 0)
+    shape.select_line_color = QtGui.QColor(0, 0, 0, 0)
+    shape.vertex_fill_color = QtGui.QColor(255, 0, 0)
+    shape.hvertex_fill_color = QtGui.QColor(0, 0, 255)
+
+    def paint():
+        image = QtGui.QImage(40, 40, QtGui.QImage.Format_ARGB32)
+        image.fill(QtGui.QColor(0, 0, 0))
+        painter = QtGui.QPainter(image)
+        shape.paint(painter)
+        painter.end()
+        return image.pixelColor(10, 10)
+
+    assert paint() == QtGui.QColor(255, 0, 0)
+    # the color is not part of the cached vertex paths
+    shape.vertex_fill_color = QtGui.QColor(0, 255, 0)
+    assert paint() == QtGui.QColor(0, 255, 0)
+    shape.highlightVertex(1, Shape.MOVE_VERTEX)
+    assert paint() == QtGui.QColor(0, 0, 255)
+    shape.highlightClear()
+    assert paint() == QtGui.QColor(0, 255, 0)
+
+
+@pytest.mark.gui
+def test_Shape_paint_lod(qtbot):
+    t = np.linspace(0, 2 * np.pi, 100, endpoint=False)
+    shape = Shape(label="a", shape_type="polygon")
+    shape.addPoints(np.stack([50 + 40 * np.cos(t), 50 + 40 * np.sin(t)], axis=1))
+    shape.close()
+
+    Shape.scale = 0.1
+    try:
+        assert not shape._isVertexVisible()
+        path = shape._getSimplifiedLinePath()
+        assert path.elementCount() < len(shape)
+        assert path.boundingRect().contains(QtCore.QRectF(11, 11, 78, 78))
+        assert shape._getSimplifiedLinePath() is path
+        shape.selected = True
+        assert shape._isVertexVisible()
+    finally:
+        Shape.scale = 1.0
+    assert shape._getSimplifiedLinePath() is shape._getLinePath()
+
+    # linestrips are closed when loaded, but not drawn closed
+    linestrip = Shape(label="a", shape_type="linestrip")
+    linestrip.addPoints([(0, 0), (0.1, 0), (100, 0), (100, 100)])
+    linestrip.close()
+    Shape.scale = 0.5
+    try:
+        path = linestrip._getSimplifiedLinePath()
+        assert path.elementCount() == 3
+        assert path.currentPosition() == QtCore.QPointF(100, 100)
+    finally:
+        Shape.scale = 1.0
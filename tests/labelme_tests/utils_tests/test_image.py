@@ -2,6 +2,7 @@ import os.path as osp
 
 import numpy as np
 import PIL.Image
+import PIL.ImageEnhance
 
 from labelme.utils import image as image_module
 
@@ -29,3 +30,27 @@ def test_img_data_to_png_data():
         img_data = f.read()
     png_data = image_module.img_data_to_png_data(img_data)
     assert isinstance(png_data, bytes)
+
+
+def test_adjust_brightness_contrast():
+    img_file = osp.join(data_dir, "annotated_with_data/apc2016_obj3.jpg")
+    img_pil = PIL.Image.open(img_file)
+    img_arr = np.asarray(img_pil)
+    for brightness, contrast in [(0.5, 1), (1, 0.3), (1.5, 2.5), (2, 0.8)]:
+        expected = img_pil
+        if brightness != 1:
+            expected = PIL.ImageEnhance.Brightness(expected).enhance(brightness)
+        if contrast != 1:
+            expected = PIL.ImageEnhance.Contrast(expected).enhance(contrast)
+        adjusted = image_module.adjust_brightness_contrast(
+            img_arr, brightness=brightness, contrast=contrast
+        )
+        assert adjusted.dtype == np.uint8
+        np.testing.assert_allclose(adjusted, np.asarray(expected), atol=1)
+
+    # alpha is kept as is
+    img_arr = np.dstack([img_arr, np.full(img_arr.shape[:2], 128, np.uint8)])
+    adjusted = image_module.adjust_brightness_contrast(
+        img_arr, brightness=1.5, contrast=2
+    )
+    assert (adjusted[:, :, 3] == 128).all()
@@ -1,3 +1,5 @@
+import numpy as np
+
 from labelme.utils import shape as shape_module
 
 from .util import get_img_and_data
@@ -22,3 +24,21 @@ def test_shape_to_mask():
         points = shape["points"]
         mask = shape_module.shape_to_mask(img.shape[:2], points)
         assert mask.shape == img.shape[:2]
+
+
+def test_shapes_to_label_matches_shape_to_mask():
+    img, data = get_img_and_data()
+    label_name_to_value = {}
+    for shape in data["shapes"]:
+        label_name_to_value[shape["label"]] = len(label_name_to_value) + 1
+    cls, ins = shape_module.shapes_to_label(
+        img.shape, data["shapes"], label_name_to_value
+    )
+
+    cls_expected = np.zeros(img.shape[:2], dtype=np.int32)
+    for shape in data["shapes"]:
+        mask = shape_module.shape_to_mask(
+            img.shape[:2], shape["points"], shape.get("shape_type")
+        )
+        cls_expected[mask] = label_name_to_value[shape["label"]]
+    np.testing.assert_array_equal(cls, cls_expected)
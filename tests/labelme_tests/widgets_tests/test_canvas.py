@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.shape import Shape
+from labelme.widgets import canvas as canvas_module
+from labelme.widgets.canvas import Canvas
+
+
+def _make_rectangle(x1, y1, x2, y2):
+    shape = Shape(label="rectangle", shape_type="rectangle")
+    shape.addPoint(QtCore.QPointF(x1, y1))
+    shape.addPoint(QtCore.QPointF(x2, y2))
+    return shape
+
+
+@pytest.mark.gui
+def test_Canvas_shapesNear(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas.loadPixmap(QtGui.QPixmap(1000, 1000))
+
+    shapes = [
+        _make_rectangle(x, y, x + 8, y + 8)
+        for y in range(0, 1000, 10)
+        for x in range(0, 1000, 10)
+    ]
+    large = _make_rectangle(0, 0, 999, 999)
+    canvas.loadShapes([large] + shapes)
+
+    point = QtCore.QPointF(505, 505)
+    near = canvas.shapesNear(point)
+    assert len(near) < 20
+    assert shapes[50 * 100 + 50] in near
+    # from the top to the bottom
+    assert near == sorted(near, key=canvas.shapes.index, reverse=True)
+    assert near[-1] is large
+    with qtbot.waitSignal(canvas.selectionChanged) as blocker:
+        canvas.selectShapePoint(point, multiple_selection_mode=False)
+    assert blocker.args == [[shapes[50 * 100 + 50]]]
+
+    # a drag updates the cells of the moved shapes, not the whole index
+    index = canvas._shapeIndex
+    canvas.selectedShapes = [shapes[0]]
+    canvas.prevPoint = QtCore.QPointF(4, 4)
+    canvas.offsets = QtCore.QPointF(-4, -4), QtCore.QPointF(4, 4)
+    for i in range(1, 11):
+        canvas.boundedMoveShapes(canvas.selectedShapes, QtCore.QPointF(4, 4) * 5 * i)
+        assert shapes[0] in canvas.shapesNear(QtCore.QPointF(4, 4) * 5 * i)
+    assert shapes[0] not in canvas.shapesNear(QtCore.QPointF(4, 4))
+    canvas.hShape, canvas.hVertex = shapes[0], 0
+    canvas.boundedMoveVertex(QtCore.QPointF(500, 500))
+    assert shapes[0] in canvas.shapesNear(point)
+    assert canvas._shapeIndex is index
+    assert not index._dirty
+
+    # the index follows additions and removals of the shapes
+    canvas.deleteShape(shapes[0])
+    assert shapes[0] not in canvas.shapesNear(point)
+    canvas.loadShapes([shapes[0]], replace=False)
+    assert canvas.shapesNear(point)[0] is shapes[0]
+    canvas.selectedShapes = [shapes[0]]
+    canvas.deleteSelected()
+    assert shapes[0] not in canvas.shapesNear(point)
+    assert canvas._shapeIndex is index
+    canvas.setShapeVisible(shapes[50 * 100 + 50], False)
+    assert shapes[50 * 100 + 50] not in canvas.shapesNear(point)
+    assert canvas.shapesNear(QtCore.QPointF(-100, -100)) == [large]
+
+
+@pytest.mark.gui
+def test_Canvas_restoreShape(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas.loadPixmap(QtGui.QPixmap(100, 100))
+
+    shapes = [_make_rectangle(0, 0, 10, 10), _make_rectangle(20, 20, 30, 30)]
+    canvas.loadShapes(shapes)
+    shapes[0].moveBy(QtCore.QPointF(5, 5))
+    canvas.storeShapes()
+
+    # unchanged shapes share the snapshot
+    assert canvas.shapesBackups[-1][1] is canvas.shapesBackups[-2][1]
+    assert canvas.shapesBackups[-1][0] is not canvas.shapesBackups[-2][0]
+
+    canvas.restoreShape()
+    assert canvas.shapes[0].coords.tolist() == [[0, 0], [10, 10]]
+    canvas.loadShapes(canvas.shapes)  # as MainWindow.undoShapeEdit
+    # edits after undo do not change the snapshots
+    canvas.shapes[1].label = "edited"
+    canvas.storeShapes()
+    assert canvas.shapesBackups[-1][1].label == "edited"
+    assert canvas.shapesBackups[-2][1].label == "rectangle"
+    assert canvas.shapesBackups[-1][0] is canvas.shapesBackups[-2][0]
+
+
+@pytest.mark.gui
+def test_Canvas_scheduleUpdate(qtbot):
+    class _Canvas(Canvas):
+        def paintEvent(self, event):
+            regions.append(event.region())
+            super().paintEvent(event)
+
+    regions = []
+    canvas = _Canvas()
+    qtbot.addWidget(canvas)
+    canvas.loadPixmap(QtGui.QPixmap(200, 200))
+    canvas.resize(200, 200)
+    shape = _make_rectangle(10, 10, 20, 20)
+    shape.line_color = QtGui.QColor(0, 255, 0)
+    shape.vertex_fill_color = QtGui.QColor(0, 255, 0)
+    canvas.loadShapes([shape])
+    canvas.show()
+    qtbot.waitExposed(canvas)
+    qtbot.waitUntil(lambda: len(regions) > 0)
+
+    # moves of a shape in a frame are painted at once
+    regions.clear()
+    for _ in range(10):
+        canvas._scheduleUpdate(canvas._getShapesRect([shape]))
+        shape.moveBy(QtCore.QPointF(5, 0))
+        canvas._scheduleUpdate(canvas._getShapesRect([shape]))
+    qtbot.waitUntil(lambda: len(regions) > 0)
+    qtbot.wait(50)
+    assert len(regions) == 1
+    rect = regions[0].boundingRect()
+    assert rect.contains(QtCore.QRect(10, 10, 60, 10))
+    assert rect.height() < 100
+
+
+class _AiModel:
+    def predict_mask_from_points(self, points, point_labels):
+        return np.zeros((100, 100), dtype=bool)
+
+
+def test_predict_ai_preview_empty_mask():
+    request = ("ai_mask", ((10.0, 10.0),), (1,))
+    assert canvas_module._predict_ai_preview(_AiModel(), request) is None
+
+
+@pytest.mark.gui
+def test_Canvas_aiPreview_requested_on_move(qtbot, monkeypatch):
+    for name in ["line_color", "fill_color", "vertex_fill_color"]:
+        monkeypatch.setattr(Shape, name, QtGui.QColor(0, 255, 0))
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas.loadPixmap(QtGui.QPixmap(100, 100))
+    canvas.resize(100, 100)
+    canvas.show()
+    qtbot.waitExposed(canvas)
+    requests = []
+    monkeypatch.setattr(canvas._ai_preview_worker, "submit", requests.append)
+
+    canvas.createMode = "ai_mask"
+    canvas.setEditing(False)
+    qtbot.mouseClick(canvas, QtCore.Qt.LeftButton, pos=QtCore.QPoint(10, 10))
+    assert canvas.current is not None
+    qtbot.mouseMove(canvas, QtCore.QPoint(20, 20))
+    assert len(requests) == 1
+    # painting does not request the same prompt again
+    canvas.update()
+    qtbot.wait(50)
+    assert len(requests) == 1
@@ -0,0 +1,94 @@
+import os.path as osp
+
+import pytest
+from qtpy.QtCore import Qt
+
+from labelme.widgets import FileListWidget
+from labelme.widgets.file_list_widget import iter_image_files
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../data")
+
+
+@pytest.mark.gui
+def test_FileListWidget(qtbot):
+    widget = FileListWidget(
+        get_label_file=lambda filename: osp.splitext(filename)[0] + ".json"
+    )
+    qtbot.addWidget(widget)
+
+    filenames = [
+        osp.join(data_dir, "annotated/2011_000003.jpg"),
+        osp.join(data_dir, "raw/2011_000003.jpg"),
+    ]
+    widget.setFilenames(filenames)
+    widget.addFilenames(filenames[:1])  # duplicate is ignored
+    assert widget.count() == 2
+    assert widget.row(filenames[1]) == 1
+    assert widget.row("not_found.jpg") == -1
+
+    model = widget.model()
+
+    def check_label_files():
+        assert model.data(model.index(0), Qt.CheckStateRole) == Qt.Checked
+
+    qtbot.waitUntil(check_label_files)
+    assert model.data(model.index(1), Qt.CheckStateRole) == Qt.Unchecked
+
+    widget.setCurrentRow(1)
+    assert widget.currentFilename() == filenames[1]
+    assert widget.selectedFilenames() == [filenames[1]]
+
+    widget.setFilterPattern("raw")
+    assert widget.filenames() == filenames[1:]
+    assert widget.row(filenames[0]) == -1
+    widget.setFilterPattern("[")  # invalid pattern is ignored
+    assert widget.filenames() == filenames
+
+
+def test_iter_image_files(tmp_path):
+    for filename in ["img10.jpg", "img2.jpg", "sub/img1.png", "label.json"]:
+        (tmp_path / filename).parent.mkdir(exist_ok=True)
+        (tmp_path / filename).touch()
+
+    cache = {}
+
+    def iter_filenames():
+        return [
+            osp.relpath(filename, tmp_path)
+            for filename in iter_image_files(
+                str(tmp_path), [".jpg", ".png"], cache=cache
+            )
+        ]
+
+    assert iter_filenames() == ["img2.jpg", "img10.jpg", osp.join("sub", "img1.png")]
+    assert set(cache) == {str(tmp_path), str(tmp_path / "sub")}
+
+    (tmp_path / "img1.jpg").touch()  # updates mtime of the directory
+    assert iter_filenames()[0] == "img1.jpg"
+
+
+@pytest.mark.gui
+def test_FileListModel_dataChanged(qtbot, tmp_path, monkeypatch):
+    filenames = []
+    for name in ["a", "b", "c", "d"]:
+        (tmp_path / (name + ".jpg")).touch()
+        if name != "c":
+            (tmp_path / (name + ".json")).touch()
+        filenames.append(str(tmp_path / (name + ".jpg")))
+
+    widget = FileListWidget(
+        get_label_file=lambda filename: osp.splitext(filename)[0] + ".json"
+    )
+    qtbot.addWidget(widget)
+    model = widget.model()
+    monkeypatch.setattr(model, "CHECK_BATCH_SIZE", 2)
+    changed_rows = []
+    model.dataChanged.connect(
+        lambda top, bottom, roles: changed_rows.append((top.row(), bottom.row()))
+    )
+    widget.setFilenames(filenames)
+
+    qtbot.waitUntil(lambda: len(changed_rows) == 2)
+    # only the rows of each batch
+    assert sorted(changed_rows) == [(0, 1), (3, 3)]
@@ -0,0 +1,106 @@
+import io
+
+import numpy as np
+import PIL.Image
+import pytest
+from qtpy import QtCore
+from qtpy import QtGui
+
+from labelme.utils import img_qt_to_arr
+from labelme.widgets.canvas import Canvas
+from labelme.widgets.image_pyramid import ImagePyramid
+
+
+def _img_arr_to_qimage(img):
+    h, w = img.shape[:2]
+    return QtGui.QImage(img.data, w, h, 3 * w, QtGui.QImage.Format_RGB888).copy()
+
+
+def _paint(pyramid, rect, scale):
+    image = QtGui.QImage(
+        int(rect.width() * scale),
+        int(rect.height() * scale),
+        QtGui.QImage.Format_RGB32,
+    )
+    image.fill(QtGui.QColor(0, 0, 0))
+    painter = QtGui.QPainter(image)
+    painter.scale(scale, scale)
+    painter.translate(-rect.topLeft())
+    pyramid.paint(painter, rect=rect, scale=scale)
+    painter.end()
+    return img_qt_to_arr(image.convertToFormat(QtGui.QImage.Format_RGBX8888))[:, :, :3]
+
+
+@pytest.mark.gui
+def test_ImagePyramid(qtbot):
+    img = np.zeros((1000, 1500, 3), dtype=np.uint8)
+    img[:, :, 0] = np.arange(1500)[None, :] // 6
+    img[:, :, 1] = np.arange(1000)[:, None] // 4
+    pyramid = ImagePyramid(_img_arr_to_qimage(img), tile_size=128, max_size_mb=1)
+    assert (pyramid.width(), pyramid.height()) == (1500, 1000)
+    assert pyramid.level(1.0) == 0
+    assert pyramid.level(0.3) == 1
+    assert pyramid.level(0.01) == 4
+
+    rect = QtCore.QRectF(0, 0, 1500, 1000)
+    assert np.array_equal(_paint(pyramid, rect, scale=1), img)
+    assert pyramid.nbytes == 0
+
+    painted = _paint(pyramid, rect, scale=0.25)
+    expected = img.reshape(250, 4, 375, 4, 3).mean(axis=(1, 3))
+    assert np.abs(painted - expected).max() <= 2
+
+    # only the visible tiles are made
+    pyramid = ImagePyramid(_img_arr_to_qimage(img), tile_size=128, max_size_mb=1)
+    _paint(pyramid, QtCore.QRectF(0, 0, 512, 512), scale=0.5)
+    assert pyramid.nbytes == 2 * 2 * 128 * 128 * 4
+
+    # tiles are evicted over the budget
+    pyramid = ImagePyramid(
+        _img_arr_to_qimage(img), tile_size=128, max_size_mb=128 * 128 * 4 / 1024**2
+    )
+    _paint(pyramid, rect, scale=0.5)
+    assert pyramid.nbytes <= 128 * 128 * 4
+
+
+@pytest.mark.gui
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG"])
+def test_ImagePyramid_data(qtbot, image_format):
+    img = np.zeros((1000, 1500, 3), dtype=np.uint8)
+    img[:, :, 0] = np.arange(1500)[None, :] // 6
+    img[:, :, 1] = np.arange(1000)[:, None] // 4
+    with io.BytesIO() as f:
+        PIL.Image.fromarray(img).save(f, format=image_format, quality=95)
+        data = f.getvalue()
+    expected = img_qt_to_arr(
+        QtGui.QImage.fromData(data).convertToFormat(QtGui.QImage.Format_RGBX8888)
+    )[:, :, :3].astype(float)
+
+    pyramid = ImagePyramid(data, tile_size=128, max_size_mb=1)
+    assert (pyramid.width(), pyramid.height()) == (1500, 1000)
+    rect = QtCore.QRectF(0, 0, 1500, 1000)
+    assert np.abs(_paint(pyramid, rect, scale=1) - expected).max() <= 1
+    painted = _paint(pyramid, rect, scale=0.25)
+    expected = expected.reshape(250, 4, 375, 4, 3).mean(axis=(1, 3))
+    assert np.abs(painted - expected).max() <= 4
+    assert pyramid.nbytes <= 1024**2
+    if image_format == "JPEG":
+        # the tiles are decoded from the file, not from the full image
+        assert pyramid._image is None
+    assert pyramid.toImage().size() == QtCore.QSize(1500, 1000)
+
+    assert ImagePyramid(b"not an image").isNull()
+
+
+@pytest.mark.gui
+def test_Canvas_loadImage(qtbot):
+    canvas = Canvas(tiled_image={"min_size": 1000, "max_size_mb": 1})
+    qtbot.addWidget(canvas)
+    canvas.loadImage(QtGui.QImage(500, 500, QtGui.QImage.Format_RGB32))
+    assert isinstance(canvas.pixmap, QtGui.QPixmap)
+    canvas.loadImage(QtGui.QImage(2000, 500, QtGui.QImage.Format_RGB32))
+    assert isinstance(canvas.pixmap, ImagePyramid)
+    assert canvas.sizeHint() == QtCore.QSize(2000, 500)
+    pyramid = ImagePyramid(b"")
+    canvas.loadImage(pyramid)
+    assert canvas.pixmap is pyramid
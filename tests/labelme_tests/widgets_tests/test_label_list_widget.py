@@ -1,7 +1,9 @@
 # -*- encoding: utf-8 -*-
 
 import pytest
+from qtpy import QtCore
 
+from labelme.shape import Shape
 from labelme.widgets import LabelListWidget
 from labelme.widgets import LabelListWidgetItem
 
@@ -18,3 +20,37 @@ def test_LabelListWidget(qtbot):
     widget.show()
     qtbot.addWidget(widget)
     qtbot.waitExposed(widget)
+
+
+@pytest.mark.gui
+def test_LabelListWidget_findItemByShape(qtbot):
+    widget = LabelListWidget()
+    qtbot.addWidget(widget)
+
+    shapes = [Shape(label=str(i)) for i in range(10)]
+    items = [LabelListWidgetItem(text=str(i), shape=s) for i, s in enumerate(shapes)]
+    widget.addItems(items)
+    assert [item.shape() for item in widget] == shapes
+    assert widget.findItemByShape(shapes[3]) is items[3]
+
+    with qtbot.waitSignal(widget.itemSelectionChanged) as blocker:
+        widget.selectItems([items[1], items[2], items[5]])
+    assert set(blocker.args[0]) == {items[1], items[2], items[5]}
+
+    widget.removeItems([items[1], items[2], items[5], items[9]])
+    assert [item.shape() for item in widget] == [shapes[i] for i in [0, 3, 4, 6, 7, 8]]
+    with pytest.raises(ValueError):
+        widget.findItemByShape(shapes[2])
+
+    # dropped items are new items with copies of the shapes
+    model = widget.model()
+    mime_data = model.mimeData([model.indexFromItem(items[0])])
+    model.dropMimeData(mime_data, QtCore.Qt.MoveAction, 3, 0, QtCore.QModelIndex())
+    model.removeRows(0, 1)
+    assert widget.findItemByShape(widget[2].shape()) is widget[2]
+    with pytest.raises(ValueError):
+        widget.findItemByShape(shapes[0])
+
+    widget.clear()
+    with pytest.raises(ValueError):
+        widget.findItemByShape(shapes[3])